@@ -18,5 +18,60 @@ ADMIN_IDS = [
     int(id_) for id_ in os.getenv("ADMIN_IDS", "123456789").split(",")
 ]
 
+# Время жизни индекса занятости мастеров в памяти (секунды)
+AVAILABILITY_INDEX_TTL = int(os.getenv("AVAILABILITY_INDEX_TTL", "60"))
+
+# Режим автоназначения заказов: "batch" - одна задача о назначениях на все
+# ожидающие заказы, "greedy" - по одному заказу в порядке очереди
+AUTO_ASSIGN_MODE = os.getenv("AUTO_ASSIGN_MODE", "batch")
+
+# Диспетчер автоназначения (секунды):
+# - интервал плановых циклов (внеочередные циклы запускаются при постановке в очередь)
+# - пауза после создания заказа, чтобы админ успел назначить мастера вручную
+# - повтор для заказов, которым не нашелся свободный мастер
+# - полная сверка очереди с БД (после перезапуска и на случай пропущенных событий)
+DISPATCH_INTERVAL_SECONDS = int(os.getenv("DISPATCH_INTERVAL_SECONDS", "30"))
+DISPATCH_GRACE_SECONDS = int(os.getenv("DISPATCH_GRACE_SECONDS", "120"))
+DISPATCH_RETRY_SECONDS = int(os.getenv("DISPATCH_RETRY_SECONDS", "300"))
+DISPATCH_RESYNC_SECONDS = int(os.getenv("DISPATCH_RESYNC_SECONDS", "600"))
+
+# Буфер между заказами одного мастера (часы). Назначение активного заказа занимает
+# у мастера интервал [время заказа, время заказа + буфер), пересечения запрещены в БД
+ASSIGNMENT_BUFFER_HOURS = int(os.getenv("ASSIGNMENT_BUFFER_HOURS", "4"))
+
+# Как часто (секунды) сверять каталог навыков в памяти с таблицей skills
+# (навыки, добавленные другим процессом бота)
+SKILL_CATALOG_TTL = int(os.getenv("SKILL_CATALOG_TTL", "60"))
+
+# Кэш ролей в AuthMiddleware (секунды): мастера и незарегистрированные пользователи
+ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", "300"))
+ROLE_CACHE_NEGATIVE_TTL = int(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "60"))
+
+# Сколько запасных мастеров держать для заказа (переназначение при отказе)
+FALLBACK_CANDIDATES = int(os.getenv("FALLBACK_CANDIDATES", "5"))
+
+# Размер страницы списков заявок в админке
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "5"))
+
+# Сколько заявок показывать в результатах поиска (/find и inline-режим)
+SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "10"))
+
+# Очистка графика мастеров (раз в сутки в SCHEDULE_COMPACTION_HOUR):
+# слоты старше SCHEDULE_RETENTION_DAYS дней уходят из master_schedule_slots -
+# "archive" - в master_schedule_slots_archive, "delete" - удаляются.
+# Обработка пачками по SCHEDULE_COMPACTION_BATCH строк, каждая - своя транзакция
+SCHEDULE_RETENTION_DAYS = int(os.getenv("SCHEDULE_RETENTION_DAYS", "30"))
+SCHEDULE_RETENTION_MODE = os.getenv("SCHEDULE_RETENTION_MODE", "archive")
+SCHEDULE_COMPACTION_BATCH = int(os.getenv("SCHEDULE_COMPACTION_BATCH", "1000"))
+SCHEDULE_COMPACTION_HOUR = int(os.getenv("SCHEDULE_COMPACTION_HOUR", "4"))
+
+# Подсказка свободного времени при создании заявки: сколько вариантов,
+# на сколько дней вперед искать, шаг сетки (минуты) и рабочие часы [начало, конец)
+FREE_SLOT_SUGGESTIONS = int(os.getenv("FREE_SLOT_SUGGESTIONS", "6"))
+FREE_SLOT_SEARCH_DAYS = int(os.getenv("FREE_SLOT_SEARCH_DAYS", "7"))
+FREE_SLOT_STEP_MINUTES = int(os.getenv("FREE_SLOT_STEP_MINUTES", "30"))
+WORK_DAY_START_HOUR = int(os.getenv("WORK_DAY_START_HOUR", "9"))
+WORK_DAY_END_HOUR = int(os.getenv("WORK_DAY_END_HOUR", "21"))
+
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
@@ -0,0 +1,165 @@
+import asyncio
+import bisect
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple, Optional, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import AVAILABILITY_INDEX_TTL
+
+
+class AvailabilityIndex:
+    """
+    Индекс занятости мастеров в памяти.
+
+    Для каждого мастера хранится отсортированный список времени его активных
+    заказов, поэтому проверка буфера - бинарный поиск O(log k) без запросов к БД.
+    Индекс строится целиком одним запросом (раз в цикл распределения или по TTL)
+    и обновляется точечно при назначении, снятии и смене статуса заказа.
+    """
+
+    def __init__(self, max_age_seconds: int = AVAILABILITY_INDEX_TTL):
+        self.max_age_seconds = max_age_seconds
+        self._times: Dict[int, List[datetime]] = {}
+        self._orders: Dict[int, Tuple[int, datetime]] = {}  # order_id -> (master_id, datetime)
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+    # ==================== Загрузка ====================
+    def build(self, rows: Iterable[Tuple[int, int, datetime]]):
+        """Построить индекс из строк (order_id, master_id, datetime)"""
+        times: Dict[int, List[datetime]] = {}
+        orders: Dict[int, Tuple[int, datetime]] = {}
+        for order_id, master_id, dt in rows:
+            times.setdefault(master_id, []).append(dt)
+            orders[order_id] = (master_id, dt)
+        for master_times in times.values():
+            master_times.sort()
+
+        changed = [
+            master_id for master_id in self._times.keys() | times.keys()
+            if self._times.get(master_id) != times.get(master_id)
+        ]
+        self._times = times
+        self._orders = orders
+        self._loaded_at = time.monotonic()
+        for master_id in changed:
+            self._notify(master_id)
+
+    async def refresh(self, session: AsyncSession):
+        """Перестроить индекс по активным назначениям из БД"""
+        from repositories.assignment import AssignmentRepository
+
+        async with self._lock:
+            rows = await AssignmentRepository(session).get_active_rows()
+            self.build(rows)
+
+    async def ensure_fresh(self, session: AsyncSession):
+        """Перестроить индекс, если он не загружен или устарел"""
+        if self.is_stale():
+            await self.refresh(session)
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self.max_age_seconds
+
+    def invalidate(self):
+        """Пометить индекс устаревшим (будет перестроен при следующем обращении)"""
+        self._loaded_at = None
+
+    # ==================== Обновления ====================
+    def subscribe(self, callback: Callable[[int], None]):
+        """callback(master_id) - вызывается при изменении загрузки мастера"""
+        self._listeners.append(callback)
+
+    def _notify(self, master_id: int):
+        for callback in self._listeners:
+            callback(master_id)
+
+    def add(self, order_id: int, master_id: int, dt: datetime):
+        """Заказ назначен мастеру (или снова стал активным)"""
+        self.remove(order_id)
+        bisect.insort(self._times.setdefault(master_id, []), dt)
+        self._orders[order_id] = (master_id, dt)
+        self._notify(master_id)
+
+    def remove(self, order_id: int):
+        """Заказ снят с мастера, завершен или отклонен"""
+        entry = self._orders.pop(order_id, None)
+        if entry is None:
+            return
+        master_id, dt = entry
+        master_times = self._times.get(master_id, [])
+        i = bisect.bisect_left(master_times, dt)
+        if i < len(master_times) and master_times[i] == dt:
+            del master_times[i]
+        self._notify(master_id)
+
+    def drop_master(self, master_id: int):
+        """Мастер удален"""
+        self._times.pop(master_id, None)
+        self._orders = {
+            order_id: entry for order_id, entry in self._orders.items()
+            if entry[0] != master_id
+        }
+        self._notify(master_id)
+
+    def snapshot(self) -> "AvailabilityIndex":
+        """
+        Независимая копия индекса (для планирования без изменения общего индекса).
+        Подписчики не копируются.
+        """
+        copy = AvailabilityIndex(self.max_age_seconds)
+        copy._times = {master_id: list(times) for master_id, times in self._times.items()}
+        copy._orders = dict(self._orders)
+        copy._loaded_at = self._loaded_at
+        return copy
+
+    # ==================== Запросы ====================
+    def contains(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def busy_times(self, master_id: int) -> List[datetime]:
+        """Время активных заказов мастера (по возрастанию)"""
+        return self._times.get(master_id, [])
+
+    def active_count(self, master_id: int) -> int:
+        """Количество активных заказов мастера"""
+        return len(self._times.get(master_id, []))
+
+    def today_count(self, master_id: int, day: Optional[date] = None) -> int:
+        """Количество активных заказов мастера на день (по умолчанию сегодня)"""
+        master_times = self._times.get(master_id)
+        if not master_times:
+            return 0
+        day_start = datetime.combine(day or date.today(), datetime.min.time())
+        lo = bisect.bisect_left(master_times, day_start)
+        hi = bisect.bisect_left(master_times, day_start + timedelta(days=1), lo)
+        return hi - lo
+
+    def load_counters(self, day: Optional[date] = None) -> Dict[int, Dict[str, int]]:
+        """
+        То же, что AssignmentRepository.get_load_counters, но из индекса
+        (обновляется при назначениях и сменах статуса, без запросов к БД)
+        """
+        return {
+            master_id: {"today": self.today_count(master_id, day), "active": len(master_times)}
+            for master_id, master_times in self._times.items()
+            if master_times
+        }
+
+    def is_free(self, master_id: int, dt: datetime, buffer_hours: int = 4) -> bool:
+        """Нет ли у мастера активного заказа ближе чем на buffer_hours к dt"""
+        master_times = self._times.get(master_id)
+        if not master_times:
+            return True
+        buffer = timedelta(hours=buffer_hours)
+        # Первый заказ строго позже dt - buffer; конфликт, если он раньше dt + buffer
+        i = bisect.bisect_right(master_times, dt - buffer)
+        return i == len(master_times) or master_times[i] >= dt + buffer
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models import Master
+from core.availability import AvailabilityIndex
+from core.skill_catalog import SkillCatalog, skill_catalog, match_counts
+from core.scoring import Blocked
+
+
+SLOT_MINUTES = 15
+
+
+class AvailabilityMatrix:
+    """
+    Матрица занятости мастеров × временные слоты (по умолчанию 15 минут)
+    для пакетного подбора мастеров сразу на много заказов.
+
+    counts[m, s] - сколько активных заказов мастера m начинается в слоте s.
+    По префиксным суммам конфликт с буфером для всех мастеров и всех заказов
+    считается векторно; слоты на границе буфера перепроверяются точно по индексу,
+    поэтому результат совпадает с поштучной проверкой.
+    """
+
+    def __init__(
+        self,
+        masters: List[Master],
+        index: AvailabilityIndex,
+        window_start: datetime,
+        window_end: datetime,
+        slot_minutes: int = SLOT_MINUTES,
+        catalog: SkillCatalog = skill_catalog,
+        blocked: Optional[Blocked] = None
+    ):
+        self.masters = masters
+        self.index = index
+        self.slot = timedelta(minutes=slot_minutes)
+        self.start = window_start.replace(second=0, microsecond=0) - timedelta(
+            minutes=window_start.minute % slot_minutes
+        )
+        self.n_slots = self._slot_of(window_end) + 1
+        self.master_ids = np.array([m.id for m in masters], dtype=np.int64)
+        self.load = np.array([index.active_count(m.id) for m in masters], dtype=np.int32)
+
+        # Занятость: заказы в окне раскладываем по слотам
+        self.counts = np.zeros((len(masters), self.n_slots), dtype=np.int32)
+        for row, master in enumerate(masters):
+            slots = [
+                self._slot_of(t) for t in index.busy_times(master.id)
+                if self.start <= t <= window_end
+            ]
+            if slots:
+                np.add.at(self.counts[row], slots, 1)
+        self.prefix = np.zeros((len(masters), self.n_slots + 1), dtype=np.int32)
+        np.cumsum(self.counts, axis=1, out=self.prefix[:, 1:])
+
+        # Навыки: битовые маски мастеров (см. SkillCatalog)
+        self.catalog = catalog
+        self.skill_masks = [m.skill_mask for m in masters]
+
+        # График (master_schedule_slots): занятые минуты -> строки мастеров
+        self.schedule_blocks: Dict[datetime, List[int]] = {}
+        for row, master in enumerate(masters):
+            for dt in (blocked or {}).get(master.id, ()):
+                self.schedule_blocks.setdefault(dt, []).append(row)
+
+    @classmethod
+    def for_orders(
+        cls,
+        masters: List[Master],
+        index: AvailabilityIndex,
+        order_times: Sequence[datetime],
+        buffer_hours: int = 4,
+        slot_minutes: int = SLOT_MINUTES,
+        blocked: Optional[Blocked] = None
+    ) -> "AvailabilityMatrix":
+        """Матрица на окно, покрывающее все заказы пакета с учетом буфера"""
+        buffer = timedelta(hours=buffer_hours)
+        return cls(
+            masters,
+            index,
+            min(order_times) - buffer,
+            max(order_times) + buffer,
+            slot_minutes,
+            blocked=blocked
+        )
+
+    def _slot_of(self, dt: datetime) -> int:
+        return (dt - self.start) // self.slot
+
+    # ==================== Запросы ====================
+    def time_free(self, order_times: Sequence[datetime], buffer_hours: int = 4) -> np.ndarray:
+        """
+        Свободен ли мастер по времени (буфер + график): bool [заказы × мастера]
+        """
+        buffer = timedelta(hours=buffer_hours)
+        lo = np.array([self._slot_of(t - buffer) for t in order_times], dtype=np.int64)
+        hi = np.array([self._slot_of(t + buffer) for t in order_times], dtype=np.int64)
+
+        # Слоты строго внутри (t - buffer, t + buffer) - гарантированный конфликт
+        inner_from = np.minimum(lo + 1, hi)
+        inner = self.prefix[:, hi] - self.prefix[:, inner_from]
+        conflict = (inner > 0).T
+
+        # Граничные слоты: заказ может быть как внутри буфера, так и снаружи
+        boundary = ((self.counts[:, lo] > 0) | (self.counts[:, hi] > 0)).T & ~conflict
+        for n, row in zip(*np.nonzero(boundary)):
+            master_id = int(self.master_ids[row])
+            conflict[n, row] = not self.index.is_free(master_id, order_times[n], buffer_hours)
+
+        free = ~conflict
+        for n, t in enumerate(order_times):
+            rows = self.schedule_blocks.get(t.replace(second=0, microsecond=0))
+            if rows:
+                free[n, rows] = False
+        return free
+
+    def skill_matches(self, skill_sets: Sequence[Sequence[int]]) -> np.ndarray:
+        """Количество совпавших навыков: int [заказы × мастера] (AND + popcount)"""
+        required = [self.catalog.mask(skill_ids) for skill_ids in skill_sets]
+        words = self.catalog.words
+        return match_counts(
+            self.catalog.to_array(required, words),
+            self.catalog.to_array(self.skill_masks, words)
+        )
+
+    def suitable(
+        self,
+        order_times: Sequence[datetime],
+        skill_sets: Sequence[Sequence[int]],
+        buffer_hours: int = 4
+    ) -> np.ndarray:
+        """
+        Мастер подходит заказу: свободен по времени и имеет хотя бы один
+        из требуемых навыков. bool [заказы × мастера]
+        """
+        return self.time_free(order_times, buffer_hours) & (self.skill_matches(skill_sets) > 0)
@@ -2,34 +2,59 @@ from typing import Callable, Awaitable, Dict, Any
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 
-from database.engine import get_session
+from database.engine import UnitOfWork
 from services.order_service import OrderService
 from services.master_service import MasterService
 from services.report_service import ReportService
 from services.skill_service import SkillService
 
 
+# Имя параметра handler'а -> класс сервиса
+SERVICES = {
+    "order_service": OrderService,
+    "master_service": MasterService,
+    "report_service": ReportService,
+    "skill_service": SkillService,
+}
+
+
 class ServiceMiddleware(BaseMiddleware):
     """
     Middleware для внедрения сервисов в handler data
-    
+
+    Сервисы создаются только те, что объявлены в параметрах handler'а, на общей
+    сессии апдейта (data["uow"] из AuthMiddleware). Шаги FSM без сервисов
+    к БД не обращаются.
+
     Usage в handler:
         async def handler(msg: Message, order_service: OrderService):
             order = await order_service.create_order(...)
     """
-    
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        async with get_session() as session:
-            # Внедряем все сервисы
-            data['session'] = session
-            data['order_service'] = OrderService(session)
-            data['report_service'] = ReportService(session)
-            data['master_service'] = MasterService(session)
-            data['skill_service'] = SkillService(session)
-            
-            return await handler(event, data)
\ No newline at end of file
+        uow = data.get("uow")
+        if uow is None:
+            async with UnitOfWork() as uow:
+                data["uow"] = uow
+                return await self._call(handler, event, data, uow)
+        return await self._call(handler, event, data, uow)
+
+    async def _call(self, handler, event, data: Dict[str, Any], uow: UnitOfWork) -> Any:
+        handler_object = data.get("handler")
+        if handler_object is None or handler_object.varkw:
+            wanted = set(SERVICES) | {"session"}
+        else:
+            wanted = handler_object.params
+
+        for name, service_class in SERVICES.items():
+            if name in wanted:
+                data[name] = service_class(uow.session)
+        if "session" in wanted:
+            data["session"] = uow.session
+
+        return await handler(event, data)
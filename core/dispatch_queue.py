@@ -0,0 +1,70 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+
+class QueuedOrder:
+    """Заказ в очереди на автоназначение"""
+
+    __slots__ = ("order_id", "eligible_at", "enqueued_at", "excluded_master_ids")
+
+    def __init__(self, order_id: int, eligible_at: float, enqueued_at: datetime):
+        self.order_id = order_id
+        self.eligible_at = eligible_at
+        self.enqueued_at = enqueued_at
+        self.excluded_master_ids: Set[int] = set()
+
+
+class DispatchQueue:
+    """
+    Очередь заказов без мастера (в памяти, по order_id).
+
+    Заказы попадают сюда при создании и при отказе мастера, а не через
+    периодический просмотр всей таблицы заказов. Постановка в очередь
+    будит диспетчер (если он запущен).
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, QueuedOrder] = {}
+        self._wakeup: Optional[Callable[[float], None]] = None
+
+    def set_wakeup(self, callback: Callable[[float], None]):
+        """callback(delay_seconds) - запланировать внеочередной цикл диспетчера"""
+        self._wakeup = callback
+
+    def push(
+        self,
+        order_id: int,
+        delay_seconds: float = 0,
+        enqueued_at: Optional[datetime] = None,
+        exclude_master_id: Optional[int] = None
+    ):
+        """Поставить заказ в очередь (не раньше чем через delay_seconds)"""
+        entry = self._entries.get(order_id)
+        if entry is None:
+            entry = QueuedOrder(order_id, 0, enqueued_at or datetime.utcnow())
+            self._entries[order_id] = entry
+        entry.eligible_at = time.time() + delay_seconds
+        if exclude_master_id is not None:
+            entry.excluded_master_ids.add(exclude_master_id)
+
+        if self._wakeup:
+            self._wakeup(delay_seconds)
+
+    def discard(self, order_id: int) -> Optional[QueuedOrder]:
+        """Убрать заказ из очереди (назначен или удален)"""
+        return self._entries.pop(order_id, None)
+
+    def due(self) -> List[QueuedOrder]:
+        """Заказы, которые уже можно распределять"""
+        now = time.time()
+        return [e for e in self._entries.values() if e.eligible_at <= now]
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+dispatch_queue = DispatchQueue()
@@ -0,0 +1,84 @@
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Set
+
+from config import FALLBACK_CANDIDATES
+from core.availability import AvailabilityIndex, availability_index
+
+
+class FallbackCandidates:
+    """
+    Запасные мастера для назначенных заказов (в порядке ранжирования).
+
+    Список составляется при назначении, поэтому при отказе мастера замена
+    берется сразу, без повторного подбора. Мастер убирается из всех списков,
+    как только меняется его загрузка (подписка на индекс занятости), а при
+    выдаче кандидат еще раз проверяется по индексу.
+    """
+
+    def __init__(self, size: int = FALLBACK_CANDIDATES):
+        self.size = size
+        self._lists: Dict[int, Deque[int]] = {}  # order_id -> master_ids
+        self._by_master: Dict[int, Set[int]] = {}  # master_id -> order_ids
+
+    def store(self, order_id: int, master_ids: Iterable[int]):
+        """Запомнить ранжированный список запасных мастеров для заказа"""
+        self.discard(order_id)
+        candidates = deque()
+        for master_id in master_ids:
+            if len(candidates) >= self.size:
+                break
+            candidates.append(master_id)
+            self._by_master.setdefault(master_id, set()).add(order_id)
+        if candidates:
+            self._lists[order_id] = candidates
+
+    def discard(self, order_id: int):
+        """Заказ завершен или удален"""
+        for master_id in self._lists.pop(order_id, ()):
+            self._unlink(master_id, order_id)
+
+    def master_changed(self, master_id: int):
+        """Загрузка мастера изменилась - его позиция в списках больше не актуальна"""
+        for order_id in self._by_master.pop(master_id, ()):
+            candidates = self._lists.get(order_id)
+            if candidates is None:
+                continue
+            candidates.remove(master_id)
+            if not candidates:
+                del self._lists[order_id]
+
+    def take(
+        self,
+        order_id: int,
+        order_datetime: datetime,
+        index: AvailabilityIndex,
+        exclude: Iterable[int] = (),
+        buffer_hours: int = 4
+    ) -> Optional[int]:
+        """Следующий свободный запасной мастер (id) или None"""
+        candidates = self._lists.get(order_id)
+        exclude = set(exclude)
+        while candidates:
+            master_id = candidates.popleft()
+            self._unlink(master_id, order_id)
+            if master_id not in exclude and index.is_free(master_id, order_datetime, buffer_hours):
+                if not candidates:
+                    del self._lists[order_id]
+                return master_id
+        self._lists.pop(order_id, None)
+        return None
+
+    def get(self, order_id: int) -> List[int]:
+        return list(self._lists.get(order_id, ()))
+
+    def _unlink(self, master_id: int, order_id: int):
+        order_ids = self._by_master.get(master_id)
+        if order_ids is not None:
+            order_ids.discard(order_id)
+            if not order_ids:
+                del self._by_master[master_id]
+
+
+fallback_candidates = FallbackCandidates()
+availability_index.subscribe(fallback_candidates.master_changed)
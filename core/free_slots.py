@@ -0,0 +1,100 @@
+import bisect
+import heapq
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from core.availability import AvailabilityIndex
+from core.scoring import Blocked
+
+
+FreeSlot = Tuple[datetime, int]  # (время, master_id)
+
+
+def align_up(dt: datetime, step: timedelta) -> datetime:
+    """Ближайшее время сетки не раньше dt (сетка с шагом step от полуночи)"""
+    day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    steps = -(-(dt - day) // step)
+    return day + steps * step
+
+
+def free_starts(
+    busy: Sequence[datetime],
+    window_start: datetime,
+    window_end: datetime,
+    buffer: timedelta,
+    step: timedelta,
+    day_start_hour: int = 0,
+    day_end_hour: int = 24,
+    blocked: Optional[Set[datetime]] = None
+) -> Iterator[datetime]:
+    """
+    Времена начала по сетке step, на которые мастер свободен (по возрастанию).
+
+    Проход по промежуткам между заказами: занятый заказ t запрещает интервал
+    (t - buffer, t + buffer), и время сразу переносится на его конец, а не
+    проверяется по шагам. busy - отсортированное время активных заказов мастера.
+    """
+    t = align_up(window_start, step)
+    i = bisect.bisect_right(busy, t - buffer)
+    while t <= window_end:
+        # Рабочее время дня
+        if t.hour < day_start_hour:
+            t = t.replace(hour=day_start_hour, minute=0)
+            continue
+        if t.hour >= day_end_hour:
+            t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+
+        # Заказы, которые уже не мешают
+        while i < len(busy) and busy[i] <= t - buffer:
+            i += 1
+        if i < len(busy) and busy[i] < t + buffer:
+            t = align_up(busy[i] + buffer, step)
+            continue
+
+        if not blocked or t not in blocked:
+            yield t
+        t += step
+
+
+def next_free_slots(
+    index: AvailabilityIndex,
+    master_ids: Iterable[int],
+    window_start: datetime,
+    window_end: datetime,
+    limit: int,
+    buffer_hours: int = 4,
+    step_minutes: int = 30,
+    day_start_hour: int = 0,
+    day_end_hour: int = 24,
+    blocked: Optional[Blocked] = None,
+    distinct_times: bool = False
+) -> List[FreeSlot]:
+    """
+    Самые ранние limit пар (время, мастер), удовлетворяющие правилу буфера.
+
+    Слияние потоков свободного времени всех мастеров через кучу: каждый поток
+    ленивый, поэтому просматривается лишь начало графика каждого мастера.
+    distinct_times=True - по одному мастеру на время.
+    """
+    buffer = timedelta(hours=buffer_hours)
+    step = timedelta(minutes=step_minutes)
+
+    def stream(master_id: int) -> Iterator[FreeSlot]:
+        # Отдельная функция: id мастера фиксируется для каждого потока
+        for t in free_starts(
+            index.busy_times(master_id), window_start, window_end, buffer, step,
+            day_start_hour, day_end_hour, (blocked or {}).get(master_id)
+        ):
+            yield t, master_id
+
+    streams = [stream(master_id) for master_id in sorted(set(master_ids))]
+
+    result: List[FreeSlot] = []
+    for slot in heapq.merge(*streams):
+        if distinct_times and result and result[-1][0] == slot[0]:
+            continue
+        result.append(slot)
+        if len(result) >= limit:
+            break
+    return result
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Dict
 from aiogram.types import (
     ReplyKeyboardMarkup, KeyboardButton,
@@ -5,6 +6,7 @@ from aiogram.types import (
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from models import OrderStatus
+from core.skill_catalog import skill_catalog
 
 
 # ==================== ADMIN KEYBOARDS ====================
@@ -91,35 +93,6 @@ def master_selection_kb(
     
     return builder.as_markup()
 
-def master_selection_kbb(masters: List[Dict], order_id: int):
-    """
-    Создать клавиатуру для выбора мастера.
-    masters: список словарей с данными мастеров (из get_masters_for_assignment).
-    order_id: ID заказа для callback_data.
-    """
-    kb = InlineKeyboardBuilder()
-    
-    for m in masters:
-        master = m["master"]
-        availability = "🟢 Свободен" if m["is_available"] else "🔴 Занят"
-        orders = f"📋 Заказов сегодня: {m['today_orders']}"
-        skills_match = (
-            f"✅ Навыки: {m['skills']}\n"
-            f"Совпадение: {m['skills_match_percent']:.0f}% ({len(m['matching_skills'])}/{len(m['matching_skills']) + len(m['missing_skills'])})"
-            if m['matching_skills'] or m['missing_skills']
-            else f"✅ Навыки: {m['skills']}"
-        )
-        
-        button_text = f"{master.name}\n{availability}\n{orders}\n{skills_match}"
-        kb.button(
-            text=button_text,
-            callback_data=f"select_master_{order_id}_{master.id}"
-        )
-    
-    kb.button(text="🔙 Назад", callback_data="back_to_orders")
-    kb.adjust(1)  # Один мастер на строку
-    return kb.as_markup()
-
 def filters_kb() -> InlineKeyboardMarkup:
     """Фильтры для списка заявок"""
     builder = InlineKeyboardBuilder()
@@ -152,31 +125,51 @@ def masters_menu_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-async def skills_checkbox_kb(selected_ids: List[int] = None) -> InlineKeyboardMarkup:
-    """Чекбоксы навыков"""
+def skills_checkbox_kb(selected_ids: List[int] = None) -> InlineKeyboardMarkup:
+    """Чекбоксы навыков (из каталога навыков в памяти, без запросов к БД)"""
     if selected_ids is None:
         selected_ids = []
     
     builder = InlineKeyboardBuilder()
     
-    from database.engine import get_session
-    from services.skill_service import SkillService
+    for skill_id, name in skill_catalog.all():
+        checkbox = "✅" if skill_id in selected_ids else "⬜"
+        builder.row(
+            InlineKeyboardButton(
+                text=f"{checkbox} {name}",
+                callback_data=f"skill_toggle_{skill_id}"
+            )
+        )
+    
+    builder.row(
+        InlineKeyboardButton(text="💾 Готово", callback_data="skills_done")
+    )
     
-    async with get_session() as session:
-        skill_service = SkillService(session)
-        skills = await skill_service.get_all_skills()
+    return builder.as_markup()
+
+
+def free_slots_kb(slots: List[Dict], current: datetime) -> InlineKeyboardMarkup:
+    """
+    Предложенное свободное время для новой заявки
+
+    slots: List[{"datetime": datetime, "master": Master}] (MasterService.find_free_slots)
+    current: время, введенное админом (можно оставить его)
+    """
+    builder = InlineKeyboardBuilder()
     
-    for skill in skills:
-        checkbox = "✅" if skill.id in selected_ids else "⬜"
+    for slot in slots:
         builder.row(
             InlineKeyboardButton(
-                text=f"{checkbox} {skill.name}",
-                callback_data=f"skill_toggle_{skill.id}"
+                text=f"🕐 {slot['datetime'].strftime('%d.%m %H:%M')} — 👤 {slot['master'].name}",
+                callback_data=f"pick_slot_{slot['datetime'].strftime('%Y%m%d%H%M')}"
             )
         )
     
     builder.row(
-        InlineKeyboardButton(text="💾 Готово", callback_data="skills_done")
+        InlineKeyboardButton(
+            text=f"📅 Оставить {current.strftime('%d.%m %H:%M')}",
+            callback_data="keep_slot"
+        )
     )
     
     return builder.as_markup()
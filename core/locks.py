@@ -0,0 +1,20 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Пространства ключей advisory-локов PostgreSQL: (namespace, key)
+MASTER_LOCK = 1
+
+
+async def advisory_xact_lock(session: AsyncSession, namespace: int, key: int):
+    """
+    Транзакционный advisory-лок (ждет освобождения).
+    Снимается автоматически при commit/rollback.
+    """
+    await session.execute(select(func.pg_advisory_xact_lock(namespace, key)))
+
+
+async def try_advisory_xact_lock(session: AsyncSession, namespace: int, key: int) -> bool:
+    """Транзакционный advisory-лок без ожидания: False, если он занят другим процессом"""
+    result = await session.execute(select(func.pg_try_advisory_xact_lock(namespace, key)))
+    return bool(result.scalar())
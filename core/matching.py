@@ -0,0 +1,72 @@
+from typing import List, Sequence, Tuple
+
+
+# Стоимость недопустимой пары (заведомо больше суммы любых допустимых)
+INFEASIBLE = 1e9
+
+
+def min_cost_assignment(cost: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """
+    Задача о назначениях (венгерский алгоритм, O(n^2 * m)).
+    cost[i][j] - стоимость назначения строки i столбцу j, матрица может быть
+    прямоугольной. Возвращает пары (i, j) минимальной суммарной стоимости;
+    пары со стоимостью INFEASIBLE отбрасываются.
+    """
+    if not cost or not cost[0]:
+        return []
+
+    transposed = len(cost) > len(cost[0])
+    matrix = [list(col) for col in zip(*cost)] if transposed else [list(row) for row in cost]
+    n, m = len(matrix), len(matrix[0])
+
+    # Потенциалы строк/столбцов и текущее паросочетание (индексы с 1)
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [float("inf")] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = matrix[i0 - 1]
+            delta = float("inf")
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                cur = row[j - 1] - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Чередующаяся цепочка: перекидываем паросочетание
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    pairs = []
+    for j in range(1, m + 1):
+        if p[j] == 0:
+            continue
+        i = p[j] - 1
+        if matrix[i][j - 1] >= INFEASIBLE:
+            continue
+        pairs.append((j - 1, i) if transposed else (i, j - 1))
+    return sorted(pairs)
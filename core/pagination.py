@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Курсор keyset-пагинации: (datetime, id) последней/первой строки страницы
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(dt: datetime, row_id: int) -> str:
+    """(datetime, id) -> компактная строка для callback_data (лимит 64 байта)"""
+    return f"{(dt - EPOCH) // MICROSECOND}.{row_id}"
+
+
+def decode_cursor(value: str) -> Optional[Cursor]:
+    """Обратное преобразование; None для битой строки"""
+    try:
+        micros, row_id = value.split(".")
+        return EPOCH + timedelta(microseconds=int(micros)), int(row_id)
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_page(parts: List[str]) -> Tuple[int, Optional[Cursor], bool]:
+    """
+    Хвост callback_data "<страница>_<n|p><курсор>" (уже разбитый по "_")
+    -> (страница, курсор, назад ли). Без курсора - первая страница.
+    """
+    try:
+        page = max(int(parts[0]), 1) if parts else 1
+    except ValueError:
+        page = 1
+    token = parts[1] if len(parts) > 1 else ""
+    cursor = decode_cursor(token[1:]) if token else None
+    if cursor is None:
+        return 1, None, False
+    return page, cursor, token[0] == "p"
+
+
+def page_token(page: int, row, backward: bool) -> str:
+    """Хвост callback_data для перехода на страницу page от граничной строки row"""
+    return f"{page}_{'p' if backward else 'n'}{encode_cursor(row.datetime, row.id)}"
+
+
+def page_flags(page: int, backward: bool, has_more: bool) -> Tuple[int, bool, bool]:
+    """(страница, есть ли предыдущая, есть ли следующая) после загрузки страницы"""
+    if backward:
+        # Назад до упора - это первая страница, вперед всегда есть куда
+        return (page if has_more else 1), has_more, True
+    return page, page > 1, has_more
@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from config import ROLE_CACHE_TTL, ROLE_CACHE_NEGATIVE_TTL
+
+
+@dataclass(frozen=True)
+class MasterSnapshot:
+    """Данные мастера для авторизации и handler'ов (без привязки к сессии)"""
+    id: int
+    telegram_id: int
+    name: str
+    phone: Optional[str] = None
+    is_online: bool = False
+
+    @classmethod
+    def from_master(cls, master) -> "MasterSnapshot":
+        return cls(
+            id=master.id,
+            telegram_id=master.telegram_id,
+            name=master.name,
+            phone=master.phone,
+            is_online=bool(master.is_online)
+        )
+
+
+class _Missing:
+    pass
+
+
+MISSING = _Missing()
+
+
+class RoleCache:
+    """
+    Кэш telegram_id -> мастер (или None - пользователь не зарегистрирован).
+
+    Записи живут ROLE_CACHE_TTL секунд, отрицательные - ROLE_CACHE_NEGATIVE_TTL.
+    MasterService сбрасывает запись при создании, изменении и удалении мастера,
+    поэтому TTL ограничивает только расхождение между процессами бота.
+    """
+
+    def __init__(
+        self,
+        ttl: int = ROLE_CACHE_TTL,
+        negative_ttl: int = ROLE_CACHE_NEGATIVE_TTL,
+        max_size: int = 10000
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[float, Optional[MasterSnapshot]]]" = OrderedDict()
+
+    def get(self, telegram_id: int) -> Union[MasterSnapshot, None, _Missing]:
+        """Снимок мастера, None (не зарегистрирован) или MISSING (нет в кэше)"""
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return MISSING
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            del self._entries[telegram_id]
+            return MISSING
+        return snapshot
+
+    def put(self, telegram_id: int, snapshot: Optional[MasterSnapshot]):
+        ttl = self.ttl if snapshot is not None else self.negative_ttl
+        self._entries[telegram_id] = (time.monotonic() + ttl, snapshot)
+        self._entries.move_to_end(telegram_id)
+        # Поток сообщений от разных незнакомых id не раздувает кэш
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *telegram_ids: Optional[int]):
+        for telegram_id in telegram_ids:
+            if telegram_id is not None:
+                self._entries.pop(telegram_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+role_cache = RoleCache()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from models import Master
+from core.availability import AvailabilityIndex
+from core.skill_catalog import SkillCatalog, skill_catalog
+
+
+# Занятые слоты графика: {master_id: {время, ...}} (ScheduleRepository.get_blocked)
+Blocked = Dict[int, Set[datetime]]
+
+
+def is_slot_free(blocked: Optional[Blocked], master_id: int, order_datetime: datetime) -> bool:
+    """Свободен ли мастер по графику (слоты - с точностью до минуты)"""
+    if not blocked:
+        return True
+    return order_datetime.replace(second=0, microsecond=0) not in blocked.get(master_id, ())
+
+
+def rank_candidates(
+    masters: List[Master],
+    index: AvailabilityIndex,
+    order_datetime: datetime,
+    required_skill_ids: List[int],
+    buffer_hours: int = 4,
+    catalog: SkillCatalog = skill_catalog,
+    blocked: Optional[Blocked] = None
+) -> List[Dict]:
+    """
+    Ранжирование мастеров для назначения на заказ.
+    Все данные уже загружены, функция не обращается к БД.
+
+    - index: индекс занятости мастеров (буфер и загрузка)
+    - required_skill_ids: требуемые навыки заказа (пусто - без фильтра),
+      названия берутся из каталога навыков
+    - blocked: занятые слоты графика мастеров
+    """
+    required = catalog.mask(required_skill_ids)
+    required_count = required.bit_count()
+    result = []
+
+    for master in masters:
+        master_mask = master.skill_mask
+        common = master_mask & required
+
+        is_available = (
+            index.is_free(master.id, order_datetime, buffer_hours)
+            and is_slot_free(blocked, master.id, order_datetime)
+        )
+
+        result.append({
+            "master": master,
+            "today_orders": index.today_count(master.id),
+            "skills": ", ".join(s.name for s in master.skills) if master.skills else "Нет навыков",
+            "is_available": is_available,
+            "matching_skills": catalog.names(common),
+            "missing_skills": catalog.names(required & ~master_mask),
+            "skills_match_percent": (
+                common.bit_count() / required_count * 100 if required_count else 100
+            )
+        })
+
+    # Сначала по совпадению навыков (убывание), затем по количеству заказов (возрастание)
+    result.sort(key=lambda x: (-x["skills_match_percent"], x["today_orders"]))
+    return result
@@ -0,0 +1,134 @@
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+WORD_BITS = 64
+
+
+class SkillCatalog:
+    """
+    Каталог навыков: у каждого навыка свой бит, набор навыков - целое число (маска).
+
+    Совпадение навыков мастера и заказа - одно AND и popcount вместо сравнения
+    списков, а для всего списка мастеров - векторное AND по массиву масок.
+    Биты выдаются по возрастанию id навыка при первой встрече и живут только
+    в памяти процесса (в БД маски не хранятся).
+
+    Каталог также хранит полный список навыков для клавиатур (загружается
+    при старте, обновляется SkillService при создании навыка). Навыки,
+    добавленные другим процессом бота, подхватывает SkillService.ensure_catalog:
+    не чаще раза в SKILL_CATALOG_TTL сверяет fingerprint() с БД.
+    """
+
+    def __init__(self):
+        self._bits: Dict[int, int] = {}  # skill_id -> номер бита
+        self._ids: List[int] = []  # номер бита -> skill_id
+        self._names: Dict[int, str] = {}
+        self._skills: List[Tuple[int, str]] = []  # все навыки: (id, название)
+        self._checked_at: Optional[float] = None
+        self.loaded = False
+
+    # ==================== Список навыков ====================
+    def load(self, skills: Iterable):
+        """Заменить список навыков (полная загрузка из БД)"""
+        skills = list(skills)
+        self.register(skills)
+        self._skills = [(s.id, s.name) for s in skills]
+        self.loaded = True
+        self.mark_checked()
+
+    def add(self, skill):
+        """Навык создан"""
+        self.register([skill])
+        self._skills = [item for item in self._skills if item[0] != skill.id]
+        self._skills.append((skill.id, skill.name))
+
+    def all(self) -> List[Tuple[int, str]]:
+        """Все навыки: [(id, название), ...]"""
+        return list(self._skills)
+
+    def fingerprint(self) -> Tuple[int, int]:
+        """(количество, максимальный id) списка - сравнивается с тем же по таблице skills"""
+        return len(self._skills), max((skill_id for skill_id, _ in self._skills), default=0)
+
+    def needs_check(self, ttl: float) -> bool:
+        """Пора ли сверить список с БД"""
+        return self._checked_at is None or time.monotonic() - self._checked_at > ttl
+
+    def mark_checked(self):
+        self._checked_at = time.monotonic()
+
+    # ==================== Регистрация ====================
+    def register(self, skills: Iterable) -> "SkillCatalog":
+        """Добавить навыки (объекты Skill) в каталог"""
+        skills = list(skills)
+        for skill in skills:
+            self._names[skill.id] = skill.name
+        self._allocate(s.id for s in skills)
+        return self
+
+    def _allocate(self, skill_ids: Iterable[int]):
+        for skill_id in sorted(set(skill_ids) - self._bits.keys()):
+            self._bits[skill_id] = len(self._ids)
+            self._ids.append(skill_id)
+
+    def unnamed(self, skill_ids: Iterable[int]) -> List[int]:
+        """Навыки, названия которых каталог еще не знает"""
+        return [skill_id for skill_id in skill_ids if skill_id not in self._names]
+
+    # ==================== Маски ====================
+    def mask(self, skill_ids: Iterable[int]) -> int:
+        """Маска набора навыков по id"""
+        skill_ids = list(skill_ids)
+        self._allocate(skill_ids)
+        result = 0
+        for skill_id in skill_ids:
+            result |= 1 << self._bits[skill_id]
+        return result
+
+    def mask_of(self, skills: Optional[Iterable]) -> int:
+        """Маска набора навыков (объекты Skill)"""
+        skills = list(skills or [])
+        self.register(skills)
+        return self.mask(s.id for s in skills)
+
+    def ids(self, mask: int) -> List[int]:
+        """id навыков маски (по возрастанию бита)"""
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(self._ids[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    def names(self, mask: int) -> List[str]:
+        """Названия навыков маски"""
+        return [self._names[i] for i in self.ids(mask) if i in self._names]
+
+    @property
+    def words(self) -> int:
+        """Сколько 64-битных слов нужно на маску"""
+        return max(1, -(-len(self._ids) // WORD_BITS))
+
+    def to_array(self, masks: Sequence[int], words: Optional[int] = None) -> np.ndarray:
+        """Маски -> массив uint64 [len(masks) × words] для векторных операций"""
+        words = words or self.words
+        result = np.zeros((len(masks), words), dtype=np.uint64)
+        for row, mask in enumerate(masks):
+            for word in range(words):
+                result[row, word] = (mask >> (word * WORD_BITS)) & 0xFFFFFFFFFFFFFFFF
+        return result
+
+
+def match_counts(required: np.ndarray, available: np.ndarray) -> np.ndarray:
+    """
+    Количество общих навыков: required [n × words], available [m × words]
+    -> int [n × m] (AND + popcount по словам)
+    """
+    common = required[:, None, :] & available[None, :, :]
+    return np.bitwise_count(common).sum(axis=2, dtype=np.int32)
+
+
+skill_catalog = SkillCatalog()
@@ -29,6 +29,30 @@ def validate_phone(phone: str) -> bool:
     return True
 
 
+def normalize_phone(phone: str) -> str:
+    """
+    Telefon raqamidan faqat raqamlarni qoldirish (qidiruv uchun).
+    +998 (90) 123-45-67 -> 998901234567
+    """
+    return re.sub(r'\D', '', phone or '')
+
+
+def to_e164(phone: str) -> Optional[str]:
+    """
+    Telefon raqamini E.164 formatiga keltirish (bir mijozni aniqlash uchun).
+    +998 90 123 45 67 -> +998901234567
+    8 (918) 123-45-67 -> +79181234567
+    Noto'g'ri raqam uchun None.
+    """
+    digits = normalize_phone(phone)
+    if len(digits) < 10 or len(digits) > 15:
+        return None
+    # Rossiya: 8XXXXXXXXXX -> +7XXXXXXXXXX
+    if len(digits) == 11 and digits.startswith('8'):
+        digits = '7' + digits[1:]
+    return f"+{digits}"
+
+
 def format_phone(phone: str) -> str:
     """
     Telefon raqamini formatlash.
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     async_sessionmaker
 )
+from sqlalchemy import text
 from config import DB_URL
 from database.base import Base
 
@@ -49,6 +50,10 @@ class DatabaseManager:
         """Создать все таблицы"""
         engine = await cls.get_engine()
         async with engine.begin() as conn:
+            # btree_gist - для exclusion constraint на assignments (master_id WITH =)
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            # pg_trgm - GIN-индексы для поиска заявок по подстроке
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await conn.run_sync(Base.metadata.create_all)
     
     @classmethod
@@ -89,6 +94,51 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+class UnitOfWork:
+    """
+    Единица работы на один апдейт Telegram.
+    Сессия создается при первом обращении к uow.session (апдейты без работы
+    с БД соединение из пула не берут), общая для авторизации и сервисов;
+    commit - один раз при выходе, rollback - при ошибке.
+    
+    Usage:
+        async with UnitOfWork() as uow:
+            master = await MasterRepository(uow.session).get(1)
+    """
+    
+    def __init__(self, session_factory: async_sessionmaker = None):
+        self._session_factory = session_factory
+        self._session: AsyncSession = None
+    
+    async def __aenter__(self) -> "UnitOfWork":
+        if self._session_factory is None:
+            self._session_factory = await DatabaseManager.get_session_factory()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._session is None:
+            return
+        try:
+            if exc_type is None:
+                await self._session.commit()
+            else:
+                await self._session.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
+    
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+    
+    @property
+    def session(self) -> AsyncSession:
+        """Сессия (создается при первом обращении)"""
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+
 async def init_db():
     """Инициализация БД (для startup)"""
     await DatabaseManager.create_tables()
@@ -1,6 +1,9 @@
 from datetime import datetime, date, timedelta
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, BufferedInputFile, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import (
+    Message, CallbackQuery, BufferedInputFile, InlineKeyboardButton, InlineKeyboardMarkup,
+    InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+)
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -9,7 +12,7 @@ import io
 from core.keyboards import (
     admin_main_kb, order_assignment_choice_kb, master_selection_kb,
     filters_kb, masters_menu_kb, skills_checkbox_kb, order_status_kb,
-    reports_menu_kb, period_selection_kb
+    reports_menu_kb, period_selection_kb, free_slots_kb
 )
 from core.utils import validate_phone
 from services.order_service import OrderService
@@ -18,7 +21,10 @@ from services.skill_service import SkillService
 from services.report_service import ReportService
 from models import OrderStatus
 from filters.role import RoleFilter
-from config import ADMIN_IDS
+from config import ADMIN_IDS, DISPATCH_GRACE_SECONDS, ORDERS_PAGE_SIZE, FREE_SLOT_SEARCH_DAYS
+from core.dispatch_queue import dispatch_queue
+from core.pagination import parse_page, page_token, page_flags
+from services.dispatcher import dispatcher
 
 router = Router()
 
@@ -153,6 +159,104 @@ async def admin_start(msg: Message, state: FSMContext):
         reply_markup=admin_main_kb()
     )
 
+@router.message(F.text == "/queue", RoleFilter("admin"))
+async def dispatch_queue_stats(msg: Message):
+    """Состояние очереди автоназначения"""
+    stats = dispatcher.stats()
+    last_cycle = (
+        stats["last_cycle_at"].strftime('%d.%m.%Y %H:%M:%S')
+        if stats["last_cycle_at"] else "—"
+    )
+    await msg.answer(
+        f"🤖 Очередь автоназначения\n\n"
+        f"📥 В очереди: {stats['queue_depth']} (готовы к назначению: {stats['due']})\n"
+        f"⏳ Самое долгое ожидание: {stats['oldest_wait_seconds']:.0f} сек\n\n"
+        f"✅ Назначено: {stats['assigned_total']}\n"
+        f"⏱ Время до назначения: среднее {stats['avg_wait_seconds']:.0f} сек, "
+        f"макс. {stats['max_wait_seconds']:.0f} сек\n\n"
+        f"🔄 Циклов: {stats['cycles_total']}, последний: {last_cycle} "
+        f"({stats['last_cycle_ms']:.0f} мс)"
+    )
+
+STATUS_TITLES = {
+    OrderStatus.new: "🆕 Новые",
+    OrderStatus.confirmed: "✅ Подтвержденные",
+    OrderStatus.in_progress: "⚙️ В работе",
+    OrderStatus.arrived: "🏠 Мастер на месте",
+    OrderStatus.completed: "✔️ Завершенные",
+    OrderStatus.rejected: "❌ Отклоненные",
+}
+
+
+@router.message(F.text == "/summary", RoleFilter("admin"))
+async def orders_summary(msg: Message, order_service: OrderService):
+    """Сводка заявок по статусам (из счетчиков, без подсчета по таблице)"""
+    summary = await order_service.get_status_summary()
+    text = "📊 Сводка заявок\n"
+    for title, counts in (("Сегодня", summary["day"]), ("Всего", summary["total"])):
+        text += f"\n{title}: {sum(counts.values())}\n"
+        for status, status_title in STATUS_TITLES.items():
+            text += f"{status_title}: {counts.get(status, 0)}\n"
+    await msg.answer(text)
+
+# ==================== Поиск заявок ====================
+def order_row_text(order) -> str:
+    """Краткое описание заявки для результатов поиска"""
+    return (
+        f"#{order.number} - {order.client_name}\n"
+        f"📞 {order.phone}\n"
+        f"👤 Мастер: {order.master_name or 'Не назначен'}\n"
+        f"Статус: {order.status.value}\n"
+        f"📅 Время: {order.datetime.strftime('%d.%m.%Y %H:%M')}\n"
+        f"📍 Адрес: {order.address}\n"
+    )
+
+
+@router.message(F.text.startswith("/find"), RoleFilter("admin"))
+async def find_orders(msg: Message, order_service: OrderService):
+    """Поиск: /find <номер, телефон, имя клиента или адрес>"""
+    parts = msg.text.split(maxsplit=1)
+    if len(parts) < 2:
+        await msg.answer(
+            "🔎 Поиск заявок: /find <запрос>\n\n"
+            "Например: /find 2025-10-12, /find 901234567, /find Иванов, /find Навои"
+        )
+        return
+    
+    orders = await order_service.search_orders(parts[1])
+    if not orders:
+        await msg.answer("🔎 Ничего не найдено")
+        return
+    
+    text = f"🔎 Найдено: {len(orders)}\n\n"
+    builder = InlineKeyboardBuilder()
+    for order in orders:
+        text += order_row_text(order) + "\n"
+        builder.row(InlineKeyboardButton(text=f"#{order.number}", callback_data=f"view_order_{order.id}"))
+    await msg.answer(text, reply_markup=builder.as_markup())
+
+
+@router.inline_query(RoleFilter("admin"))
+async def find_orders_inline(query: InlineQuery, order_service: OrderService):
+    """Inline-поиск заявок (@bot <запрос>)"""
+    orders = await order_service.search_orders(query.query) if query.query else []
+    results = [
+        InlineQueryResultArticle(
+            id=str(order.id),
+            title=f"#{order.number} - {order.client_name}",
+            description=f"{order.datetime.strftime('%d.%m.%Y %H:%M')} • {order.address}",
+            input_message_content=InputTextMessageContent(message_text=order_row_text(order))
+        )
+        for order in orders
+    ]
+    await query.answer(results, cache_time=5, is_personal=True)
+
+
+@router.inline_query()
+async def inline_query_fallback(query: InlineQuery):
+    """Inline-запросы не админов: пустой ответ, чтобы клиент не ждал таймаута"""
+    await query.answer([], cache_time=300, is_personal=True)
+
 # ==================== Новая заявка ====================
 @router.message(F.text == "🆕 Новая заявка")
 async def new_order_start(msg: Message, state: FSMContext):
@@ -167,7 +271,7 @@ async def process_client_name(msg: Message, state: FSMContext):
     await msg.answer("📞 Введите телефон (например: +998901234567):")
 
 @router.message(AdminStates.waiting_phone)
-async def process_phone(msg: Message, state: FSMContext):
+async def process_phone(msg: Message, state: FSMContext, order_service: OrderService):
     phone = msg.text.strip()
     if not validate_phone(phone):
         await msg.answer(
@@ -178,6 +282,19 @@ async def process_phone(msg: Message, state: FSMContext):
         return
     await state.update_data(phone=phone)
     await state.set_state(AdminStates.waiting_address)
+    
+    # Повторный клиент: показываем прошлые заявки, мастеров и адреса
+    history = await order_service.get_client_history(phone)
+    if history:
+        text = f"🔁 Клиент уже обращался (последние {len(history)}):\n\n"
+        for order in history:
+            text += (
+                f"#{order.number} • {order.datetime.strftime('%d.%m.%Y')} • {order.status.value}\n"
+                f"🔧 {order.type} {order.brand} {order.model}\n"
+                f"👤 Мастер: {order.master_name or 'Не назначен'}\n"
+                f"📍 {order.address}\n\n"
+            )
+        await msg.answer(text)
     await msg.answer("📍 Введите адрес:")
 
 @router.message(AdminStates.waiting_address)
@@ -200,7 +317,8 @@ async def process_datetime(msg: Message, state: FSMContext, skill_service: Skill
             return
         await state.update_data(datetime=dt)
         await state.set_state(AdminStates.waiting_skills)
-        kb = await skills_checkbox_kb()
+        await skill_service.ensure_catalog()
+        kb = skills_checkbox_kb()
         await msg.answer(
             "🔧 Выберите необходимые навыки для заявки:\n"
             "(можно несколько)",
@@ -223,16 +341,51 @@ async def toggle_order_skill(callback: CallbackQuery, state: FSMContext):
     else:
         selected.append(skill_id)
     await state.update_data(selected_skills=selected)
-    kb = await skills_checkbox_kb(selected)
+    kb = skills_checkbox_kb(selected)
     await callback.message.edit_reply_markup(reply_markup=kb)
     await callback.answer()
 
 @router.callback_query(F.data == "skills_done", AdminStates.waiting_skills)
-async def skills_done(callback: CallbackQuery, state: FSMContext):
+async def skills_done(callback: CallbackQuery, state: FSMContext, master_service: MasterService):
     data = await state.get_data()
-    if not data.get("selected_skills"):
+    skill_ids = data.get("selected_skills")
+    if not skill_ids:
         await callback.answer("❌ Выберите хотя бы один навык!", show_alert=True)
         return
+    
+    # На введенное время никто не свободен - предлагаем ближайшее свободное
+    dt = data["datetime"]
+    if not await master_service.find_suitable_masters(dt, skill_ids):
+        date_from = max(datetime.now(), datetime.combine(dt.date(), datetime.min.time()))
+        slots = await master_service.find_free_slots(
+            skill_ids, date_from, date_from + timedelta(days=FREE_SLOT_SEARCH_DAYS)
+        )
+        if slots:
+            await callback.message.edit_text(
+                f"⚠️ На {dt.strftime('%d.%m.%Y %H:%M')} нет свободных мастеров с этими навыками.\n\n"
+                f"Ближайшее свободное время:",
+                reply_markup=free_slots_kb(slots, dt)
+            )
+            await callback.answer()
+            return
+    
+    await state.set_state(AdminStates.waiting_type)
+    await callback.message.edit_text("🔧 Введите тип техники:")
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("pick_slot_"), AdminStates.waiting_skills)
+async def pick_free_slot(callback: CallbackQuery, state: FSMContext):
+    dt = datetime.strptime(callback.data.split("_")[2], "%Y%m%d%H%M")
+    await state.update_data(datetime=dt)
+    await state.set_state(AdminStates.waiting_type)
+    await callback.message.edit_text(
+        f"📅 Время визита: {dt.strftime('%d.%m.%Y %H:%M')}\n\n"
+        f"🔧 Введите тип техники:"
+    )
+    await callback.answer()
+
+@router.callback_query(F.data == "keep_slot", AdminStates.waiting_skills)
+async def keep_entered_slot(callback: CallbackQuery, state: FSMContext):
     await state.set_state(AdminStates.waiting_type)
     await callback.message.edit_text("🔧 Введите тип техники:")
     await callback.answer()
@@ -276,6 +429,10 @@ async def create_order(msg: Message, state: FSMContext, order_service: OrderServ
     
     await state.update_data(order_id=order.id)
     
+    # Если админ не выберет мастера сам, заказ назначит диспетчер
+    if data.get("selected_skills"):
+        dispatch_queue.push(order.id, delay_seconds=DISPATCH_GRACE_SECONDS)
+    
     # Икки вариантли клавиатура кўрсатамиз
     kb = order_assignment_choice_kb(order.id)
     
@@ -312,7 +469,7 @@ async def auto_assign_master(
         return
     
     # Энг яхши мастерни топамиз
-    best_master = await master_service.auto_assign_best_master(order.datetime, skill_ids)
+    best_master = await master_service.auto_assign_best_master(order.datetime, skill_ids, order.id)
     
     if best_master:
         # Мастерни тайинлаймиз (статус new, график НЕ бронируем)
@@ -382,16 +539,27 @@ async def manual_assign_choice(
             reply_markup=kb
         )
     else:
-        # Мос мастер йўқ - барча мастерларни кўрсатамиз
-        all_masters = await master_service.get_all_masters_with_today_count()
+        # Навыки не совпали - показываем мастеров, свободных в это время, с любыми навыками.
+        # Занятых не предлагаем: назначение с пересечением по буферу запрещено в БД
+        free_masters = [
+            m for m in await master_service.get_masters_for_assignment(order.datetime, skill_ids)
+            if m["is_available"]
+        ]
         
-        kb = master_selection_kb(all_masters, order_id, show_all=True)
-        await callback.message.edit_text(
-            f"⚠️ Нет подходящих мастеров для времени {order.datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"📋 Заявка #{order.number}\n"
-            f"Показаны все мастера (могут быть заняты):",
-            reply_markup=kb
-        )
+        kb = master_selection_kb(free_masters, order_id, show_all=True)
+        if free_masters:
+            text = (
+                f"⚠️ Нет мастеров с нужными навыками на {order.datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
+                f"📋 Заявка #{order.number}\n"
+                f"Свободные мастера с другими навыками:"
+            )
+        else:
+            text = (
+                f"⚠️ Все мастера заняты на {order.datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
+                f"📋 Заявка #{order.number}\n"
+                f"Заявка остается в очереди автоназначения."
+            )
+        await callback.message.edit_text(text, reply_markup=kb)
     
     await state.set_state(AdminStates.waiting_manual_master)
     await callback.answer()
@@ -497,7 +665,7 @@ async def list_orders(msg: Message, state: FSMContext):
 async def filter_orders_by_master(callback: CallbackQuery, order_service: OrderService, state: FSMContext):
     master_id = int(callback.data.split("_")[2])
     
-    orders = await order_service.get_orders_by_master(master_id)
+    orders = await order_service.get_order_list_by_master(master_id)
     
     if not orders:
         await callback.message.edit_text(
@@ -532,70 +700,50 @@ async def filter_orders_by_master(callback: CallbackQuery, order_service: OrderS
     await state.clear()
     await callback.answer()
 
+# Фильтр -> (заголовок, статус); "today" дополнительно ограничен сегодняшним днем
+ORDER_FILTERS = {
+    "all": ("Все заявки", None),
+    "new": ("Новые заявки", OrderStatus.new),
+    "confirmed": ("Подтвержденные заявки", OrderStatus.confirmed),
+    "work": ("В работе", OrderStatus.in_progress),
+    "arrived": ("Мастер на месте", OrderStatus.arrived),
+    "done": ("Завершенные", OrderStatus.completed),
+    "rejected": ("Отклоненные", OrderStatus.rejected),
+    "today": ("Заявки на сегодня", None),
+}
+
+
 @router.callback_query(F.data.startswith("filter_"))
 async def filter_orders(callback: CallbackQuery, order_service: OrderService, master_service: MasterService, state: FSMContext):
+    # filter_<тип>[_<страница>_<n|p><курсор>]: курсор - граничная строка
+    # соседней страницы, n - следующая страница, p - предыдущая
     data_parts = callback.data.split("_")
     filter_type = data_parts[1]
-    page_str = data_parts[2] if len(data_parts) > 2 else "1"
-    try:
-        page = int(page_str)
-    except ValueError:
-        page = 1
-    
-    limit = 5
-    offset = (page - 1) * limit
-    
-    if filter_type == "all":
-        orders = await order_service.order_repo.get_all(limit=limit, offset=offset)
-        title = "Все заявки"
-        total_orders = await order_service.order_repo.get_count()
-    elif filter_type == "new":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.new, limit=limit, offset=offset)
-        title = "Новые заявки"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.new)  # Assume similar count method
-    elif filter_type == "confirmed":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.confirmed, limit=limit, offset=offset)
-        title = "Подтвержденные заявки"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.confirmed)
-    elif filter_type == "work":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.in_progress, limit=limit, offset=offset)
-        title = "В работе"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.in_progress)
-    elif filter_type == "arrived":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.arrived, limit=limit, offset=offset)
-        title = "Мастер на месте"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.arrived)
-    elif filter_type == "done":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.completed, limit=limit, offset=offset)
-        title = "Завершенные"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.completed)
-    elif filter_type == "rejected":
-        orders = await order_service.get_orders_by_filter(status=OrderStatus.rejected, limit=limit, offset=offset)
-        title = "Отклоненные"
-        total_orders = await order_service.get_orders_count_by_filter(status=OrderStatus.rejected)
-    elif filter_type == "today":
-        from datetime import date
-        orders = await order_service.order_repo.get_by_date_range(
-            date.today(), 
-            date.today(),
-            limit=limit,
-            offset=offset
-        )
-        title = "Заявки на сегодня"
-        total_orders = await order_service.order_repo.get_count_by_date_range(date.today(), date.today())  # Assume count method
-    elif filter_type == "bymaster":
-        print("Filter by master selected")
+    page, cursor, backward = parse_page(data_parts[2:])
+
+    if filter_type == "bymaster":
         # Переходим к выбору мастера для фильтра
         kb = await masters_filter_kb(master_service)
         await callback.message.edit_text("Выберите мастера для просмотра его заявок:", reply_markup=kb)
         await state.set_state(AdminStates.selecting_master_for_filter)
         await callback.answer()
         return
+
+    limit = ORDERS_PAGE_SIZE
+    if filter_type in ORDER_FILTERS:
+        title, status = ORDER_FILTERS[filter_type]
+        day = date.today() if filter_type == "today" else None
+        orders, has_more = await order_service.get_orders_page(
+            status=status, day=day, cursor=cursor, backward=backward, limit=limit
+        )
+        total_orders = await order_service.count_orders(status=status, day=day)
     else:
-        orders = []
+        orders, has_more = [], False
         title = "Неизвестный фильтр"
         total_orders = 0
-    
+
+    page, has_prev, has_next = page_flags(page, backward, has_more)
+
     # Store filter and page in state for navigation
     await state.update_data(filter_type=filter_type, current_page=page)
     
@@ -607,12 +755,13 @@ async def filter_orders(callback: CallbackQuery, order_service: OrderService, ma
         await callback.answer()
         return
     
-    text = f"📋 {title} (страница {page} из {((total_orders - 1) // limit + 1)}):\n\n"
+    # Страницы считаются от курсора: после удалений номер может превысить итог
+    total_pages = max((total_orders - 1) // limit + 1, page)
+    text = f"📋 {title} (страница {page} из {total_pages}):\n\n"
     builder = InlineKeyboardBuilder()
     
     for order in orders:
-        assignment = await order_service.assignment_repo.get_by_order(order.id)
-        assigned_master = assignment.master.name if assignment and assignment.master else "Не назначен"
+        assigned_master = order.master_name or "Не назначен"
         text += (
             f"#{order.number} - {order.client_name}\n"
             f"🔧 Тип: {order.type} {order.brand} {order.model}\n"
@@ -630,12 +779,13 @@ async def filter_orders(callback: CallbackQuery, order_service: OrderService, ma
         builder.row(*row_buttons)
     
     # Pagination buttons
-    total_pages = (total_orders - 1) // limit + 1
     pagination_row = []
-    if page > 1:
-        pagination_row.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"filter_{filter_type}_{page-1}"))
-    if page < total_pages:
-        pagination_row.append(InlineKeyboardButton(text="Вперед ▶️", callback_data=f"filter_{filter_type}_{page+1}"))
+    if has_prev:
+        token = page_token(page - 1, orders[0], backward=True)
+        pagination_row.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"filter_{filter_type}_{token}"))
+    if has_next:
+        token = page_token(page + 1, orders[-1], backward=False)
+        pagination_row.append(InlineKeyboardButton(text="Вперед ▶️", callback_data=f"filter_{filter_type}_{token}"))
     if pagination_row:
         builder.row(*pagination_row)
     
@@ -752,12 +902,14 @@ async def start_assign_existing_order(callback: CallbackQuery, state: FSMContext
     # Используем новый метод вместо find_suitable_masters
     skill_ids = [s.id for s in order.required_skills] if order.required_skills else []
     masters = await master_service.get_masters_for_assignment(order.datetime, skill_ids)
+    # Только свободные: назначение с пересечением по буферу запрещено в БД
+    masters = [m for m in masters if m["is_available"]]
     
     if not masters:
         await callback.message.edit_text(
             f"📋 Назначение мастера для заявки #{order.number}\n"
             f"📅 Время: {order.datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"⚠️ Мастера не найдены. Создайте новых мастеров.",
+            f"⚠️ Нет свободных мастеров на это время.",
             reply_markup=None
         )
         await callback.answer()
@@ -789,7 +941,11 @@ async def assign_selected_master(callback: CallbackQuery, state: FSMContext, ord
         return
     
     # Назначаем мастера (без изменения статуса на confirmed!)
-    order = await order_service.assign_master_to_order(order_id, master_id)
+    try:
+        order = await order_service.assign_master_to_order(order_id, master_id)
+    except ValueError as e:
+        await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
+        return
     
     # Уведомляем мастера с OrderStatus.new
     await bot.send_message(
@@ -908,7 +1064,7 @@ async def process_master_phone(msg: Message, state: FSMContext):
     await msg.answer("📱 Введите Telegram ID мастера (число):")
 
 @router.message(AdminStates.adding_master_telegram)
-async def process_master_telegram(msg: Message, state: FSMContext, master_service: MasterService):
+async def process_master_telegram(msg: Message, state: FSMContext, master_service: MasterService, skill_service: SkillService):
     try:
         telegram_id = int(msg.text.strip())
         existing_master = await master_service.master_repo.get_by_telegram_id(telegram_id)
@@ -917,7 +1073,8 @@ async def process_master_telegram(msg: Message, state: FSMContext, master_servic
             return
         await state.update_data(master_telegram_id=telegram_id)
         await state.set_state(AdminStates.adding_master_skills)
-        kb = await skills_checkbox_kb()
+        await skill_service.ensure_catalog()
+        kb = skills_checkbox_kb()
         await msg.answer(
             "🔧 Выберите навыки мастера:",
             reply_markup=kb
@@ -935,7 +1092,7 @@ async def toggle_master_skill(callback: CallbackQuery, state: FSMContext):
     else:
         selected.append(skill_id)
     await state.update_data(selected_skills=selected)
-    kb = await skills_checkbox_kb(selected)
+    kb = skills_checkbox_kb(selected)
     await callback.message.edit_reply_markup(reply_markup=kb)
     await callback.answer()
 
@@ -1051,11 +1208,12 @@ async def process_update_master_telegram(msg: Message, state: FSMContext, master
         await msg.answer("❌ Должен быть числом. Попробуйте снова:")
 
 @router.callback_query(F.data == "update_skills", AdminStates.selecting_master_to_update)
-async def update_master_skills_start(callback: CallbackQuery, state: FSMContext):
+async def update_master_skills_start(callback: CallbackQuery, state: FSMContext, skill_service: SkillService):
     await state.set_state(AdminStates.updating_master_skills)
+    await skill_service.ensure_catalog()
     data = await state.get_data()
     selected = data.get("selected_skills", [])
-    kb = await skills_checkbox_kb(selected)
+    kb = skills_checkbox_kb(selected)
     await callback.message.edit_text("🔧 Выберите новые навыки мастера:", reply_markup=kb)
     await callback.answer()
 
@@ -1069,7 +1227,7 @@ async def toggle_update_master_skill(callback: CallbackQuery, state: FSMContext)
     else:
         selected.append(skill_id)
     await state.update_data(selected_skills=selected)
-    kb = await skills_checkbox_kb(selected)
+    kb = skills_checkbox_kb(selected)
     await callback.message.edit_reply_markup(reply_markup=kb)
     await callback.answer()
 
@@ -1280,8 +1438,8 @@ async def select_period(callback: CallbackQuery, state: FSMContext, report_servi
     elif report_type == "masters":
         report = await report_service.get_masters_report(date_from, date_to)
         text = f"👥 Отчет по мастерам ({period_text}):\n\n"
-        for master_name, stats in report.items():
-            text += f"{master_name}: {stats['orders_count']} заказов, прибыль {stats['total_profit']:.2f} ₽\n"
+        for stats in report.values():
+            text += f"{stats['name']}: {stats['orders_count']} заказов, прибыль {stats['total_profit']:.2f} ₽\n"
         df = await report_service.get_masters_export_data(date_from, date_to)
         output = io.BytesIO()
         df.to_excel(output, index=False, engine='openpyxl')
@@ -1366,8 +1524,8 @@ async def process_date_to_and_generate(msg: Message, state: FSMContext, report_s
         elif report_type == "masters":
             report = await report_service.get_masters_report(date_from, date_to)
             text = f"👥 Отчет по мастерам ({period_text}):\n\n"
-            for master_name, stats in report.items():
-                text += f"{master_name}: {stats['orders_count']} заказов, прибыль {stats['total_profit']:.2f} ₽\n"
+            for stats in report.values():
+                text += f"{stats['name']}: {stats['orders_count']} заказов, прибыль {stats['total_profit']:.2f} ₽\n"
             df = await report_service.get_masters_export_data(date_from, date_to)
             output = io.BytesIO()
             df.to_excel(output, index=False, engine='openpyxl')
@@ -5,10 +5,11 @@ from aiogram.fsm.state import State, StatesGroup
 from core.keyboards import master_main_kb, order_status_kb, master_orders_kb
 from services.order_service import OrderService
 from services.master_service import MasterService
-from models import OrderStatus, Master
+from models import OrderStatus, Master, ACTIVE_ORDER_STATUSES
 from core.utils import get_status_emoji, format_money
 from filters.role import RoleFilter
-from config import ADMIN_IDS
+from config import ADMIN_IDS, ORDERS_PAGE_SIZE
+from core.pagination import parse_page, page_token, page_flags
 from datetime import date
 
 router = Router()
@@ -45,34 +46,18 @@ async def master_start(msg: Message, state: FSMContext, master: Master):
     )
 
 # ==================== Мои заявки ====================
-@router.message(F.text == "📋 Мои заявки")
-async def my_orders(msg: Message, state: FSMContext, master: Master, master_service: MasterService):
-    """Список заявок мастера"""
-    await state.clear()
-    orders = await master_service.get_master_orders(master.id)
-   
-    if not orders:
-        await msg.answer(
-            "📋 У вас пока нет заявок.\n"
-            "Ожидайте назначения от администратора.",
-            reply_markup=master_main_kb()
-        )
-        return
-   
-    active = [o for o in orders if o.status in [
-        OrderStatus.new,
-        OrderStatus.confirmed,
-        OrderStatus.in_progress,
-        OrderStatus.arrived
-    ]]
-   
-    completed = [o for o in orders if o.status == OrderStatus.completed]
-   
+async def orders_overview(master_service: MasterService, master_id: int):
+    """Текст сводки "Мои заявки" и есть ли активные (None - заявок нет)"""
+    active, _ = await master_service.get_master_orders(master_id, statuses=ACTIVE_ORDER_STATUSES, limit=5)
+    completed = await master_service.count_master_orders(master_id, (OrderStatus.completed,))
+    if not active and not completed:
+        return None
+    
     text = "📋 Ваши заявки:\n\n"
-   
+    
     if active:
         text += "🔄 Активные:\n"
-        for order in active[:5]:
+        for order in active:
             emoji = get_status_emoji(order.status.value)
             text += (
                 f"{emoji} #{order.number}\n"
@@ -80,21 +65,50 @@ async def my_orders(msg: Message, state: FSMContext, master: Master, master_serv
                 f" Адрес: {order.address}\n"
                 f" Время: {order.datetime.strftime('%d.%m %H:%M')}\n\n"
             )
-   
+    
     if completed:
-        text += f"\n✅ Завершено: {len(completed)}"
+        text += f"\n✅ Завершено: {completed}"
+    
+    return text, bool(active)
+
+
+def pagination_row(prefix: str, page: int, orders, has_prev: bool, has_next: bool) -> list:
+    """Кнопки ◀️/▶️ keyset-страниц (курсор в callback_data)"""
+    row = []
+    if has_prev:
+        row.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"{prefix}_{page_token(page - 1, orders[0], backward=True)}"))
+    if has_next:
+        row.append(InlineKeyboardButton(text="Вперед ▶️", callback_data=f"{prefix}_{page_token(page + 1, orders[-1], backward=False)}"))
+    return row
+
+
+@router.message(F.text == "📋 Мои заявки")
+async def my_orders(msg: Message, state: FSMContext, master: Master, master_service: MasterService):
+    """Список заявок мастера"""
+    await state.clear()
+    overview = await orders_overview(master_service, master.id)
    
-    await msg.answer(text, reply_markup=master_orders_kb(bool(active)))
+    if overview is None:
+        await msg.answer(
+            "📋 У вас пока нет заявок.\n"
+            "Ожидайте назначения от администратора.",
+            reply_markup=master_main_kb()
+        )
+        return
+   
+    text, has_active = overview
+    await msg.answer(text, reply_markup=master_orders_kb(has_active))
 
 # ==================== График ====================
 @router.message(F.text == "📅 График")
 async def show_schedule(msg: Message, state: FSMContext, master: Master, master_service: MasterService):
-    """Показать график работы"""
+    """Показать график работы (на неделю вперед)"""
     await state.clear()
     
-    today_orders = await master_service.get_today_orders(master.id)
+    schedule = await master_service.get_schedule(master.id, date.today(), days=7)
     
-    if not master.schedule or not any(master.schedule.values()):
+    if not schedule:
+        today_orders = await master_service.get_today_orders(master.id)
         text = "📅 Ваш график пуст.\n"
         if not today_orders:
             text += "У вас нет назначенных заказов на сегодня."
@@ -104,16 +118,12 @@ async def show_schedule(msg: Message, state: FSMContext, master: Master, master_
         return
     
     text = "📅 Ваш график:\n\n"
-    sorted_dates = sorted(master.schedule.keys())
-    
-    for date_str in sorted_dates[:7]:
-        times = master.schedule[date_str]
-        if times:
-            text += f"📆 {date_str}:\n"
-            for time, status in sorted(times.items()):
-                status_emoji = "🔴" 
-                text += f" • {time} {status_emoji} ({status})\n"
-            text += "\n"
+    for date_str, times in schedule.items():
+        text += f"📆 {date_str}:\n"
+        for time, status in times.items():
+            status_emoji = "🔴" 
+            text += f" • {time} {status_emoji} ({status})\n"
+        text += "\n"
     
     await msg.answer(text, reply_markup=master_main_kb())
 
@@ -186,10 +196,13 @@ async def show_today_orders(callback: CallbackQuery, master: Master, master_serv
     await callback.answer()
 
 # ==================== Все работы ====================
-@router.callback_query(F.data == "master_all_orders")
+@router.callback_query(F.data.startswith("master_all_orders"))
 async def show_all_orders(callback: CallbackQuery, master: Master, master_service: MasterService, bot: Bot):
-    """Показать все заказы мастера"""
-    orders = await master_service.get_master_orders(master.id)
+    """Показать все заказы мастера (по страницам)"""
+    page, cursor, backward = parse_page(callback.data.split("_")[3:])
+    orders, has_more = await master_service.get_master_orders(
+        master.id, cursor=cursor, backward=backward, limit=ORDERS_PAGE_SIZE
+    )
     
     if not orders:
         await callback.message.edit_text(
@@ -199,7 +212,8 @@ async def show_all_orders(callback: CallbackQuery, master: Master, master_servic
         await callback.answer()
         return
     
-    text = "📋 Все работы:\n\n"
+    page, has_prev, has_next = page_flags(page, backward, has_more)
+    text = f"📋 Все работы (страница {page}):\n\n"
     for order in orders:
         emoji = get_status_emoji(order.status.value)
         text += (
@@ -210,22 +224,26 @@ async def show_all_orders(callback: CallbackQuery, master: Master, master_servic
             f" Статус: {order.status.value}\n\n"
         )
     
-    active_orders = [o for o in orders if o.status in [OrderStatus.new, OrderStatus.confirmed, OrderStatus.in_progress, OrderStatus.arrived]]
-    await callback.message.edit_text(
-        text,
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text=f"Изменить #{o.number}", callback_data=f"edit_order_{o.id}")]
-            for o in active_orders
-        ] + [[InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_orders")]])
-    )
+    active_orders = [o for o in orders if o.status in ACTIVE_ORDER_STATUSES]
+    keyboard = [
+        [InlineKeyboardButton(text=f"Изменить #{o.number}", callback_data=f"edit_order_{o.id}")]
+        for o in active_orders
+    ]
+    navigation = pagination_row("master_all_orders", page, orders, has_prev, has_next)
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.append([InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_orders")])
+    await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard))
     await callback.answer()
 
 # ==================== Архив ====================
-@router.callback_query(F.data == "master_orders_archive")
+@router.callback_query(F.data.startswith("master_orders_archive"))
 async def show_archive_orders(callback: CallbackQuery, master: Master, master_service: MasterService):
-    """Показать завершенные заказы"""
-    orders = await master_service.get_master_orders(master.id)
-    completed = [o for o in orders if o.status == OrderStatus.completed]
+    """Показать завершенные заказы (по страницам)"""
+    page, cursor, backward = parse_page(callback.data.split("_")[3:])
+    completed, has_more = await master_service.get_master_orders(
+        master.id, statuses=(OrderStatus.completed,), cursor=cursor, backward=backward, limit=10
+    )
     
     if not completed:
         await callback.message.edit_text(
@@ -235,19 +253,25 @@ async def show_archive_orders(callback: CallbackQuery, master: Master, master_se
         await callback.answer()
         return
     
-    text = "✅ Завершенные заявки:\n\n"
+    page, has_prev, has_next = page_flags(page, backward, has_more)
+    text = f"✅ Завершенные заявки (страница {page}):\n\n"
     total_profit = 0
     
-    for order in completed[:10]:
+    for order in completed:
         text += (
             f"#{order.number} - {order.client_name}\n"
             f" Прибыль: {format_money(order.profit)}\n"
         )
-        total_profit += order.profit
+        total_profit += order.profit or 0
     
-    text += f"\n💎 Общая прибыль: {format_money(total_profit)}"
+    text += f"\n💰 Прибыль на странице: {format_money(total_profit)}"
+    text += f"\n💎 Общая прибыль: {format_money(await master_service.get_master_profit(master.id))}"
     
-    await callback.message.edit_text(text, reply_markup=master_orders_kb())
+    keyboard = master_orders_kb()
+    navigation = pagination_row("master_orders_archive", page, completed, has_prev, has_next)
+    if navigation:
+        keyboard.inline_keyboard.insert(0, navigation)
+    await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
 # ==================== Изменение статуса заказа ====================
@@ -640,27 +664,16 @@ async def reject_order_with_reason(
         await state.clear()
         return
     
-    assignment = await order_service.assignment_repo.get_by_order(order_id)
-    if assignment:
-        await order_service.assignment_repo.delete(assignment.id)
-    
-    await master_service.update_schedule(master.id, order.datetime, "отменено")
-    order = await order_service.update_status(order_id, OrderStatus.rejected)
-    
-    await order_service.session.commit()
-    
-    skill_ids = [s.id for s in order.required_skills] if order.required_skills else []
-    new_master = await master_service.find_available_master(
-        datetime=order.datetime,
-        skill_ids=skill_ids,
-        exclude_master_id=master.id
+    # Замена - из запасного списка, составленного при назначении
+    new_master = await master_service.take_fallback_master(order, exclude_master_id=master.id)
+    order = await order_service.reject_and_reassign(
+        order_id, master.id, new_master.id if new_master else None
     )
+    if order.status != OrderStatus.new:
+        # Замену успел занять другой заказ
+        new_master = None
     
     if new_master:
-        await order_service.assign_master_to_order(order_id, new_master.id)
-        order = await order_service.update_status(order_id, OrderStatus.new)
-        await order_service.session.commit()
-        
         await bot.send_message(
             new_master.telegram_id,
             f"🆕 Новая заявка #{order.number}!\n\n"
@@ -702,13 +715,14 @@ async def reject_order_with_reason(
             f"👥 Клиент: {order.client_name}\n"
             f"📍 Адрес: {order.address}\n"
             f"📅 Время: {order.datetime.strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"Назначьте мастера вручную через меню 'Заявки'"
+            f"🔄 Заказ в очереди автоназначения - мастер будет назначен, как только освободится.\n"
+            f"Можно назначить мастера вручную через меню 'Заявки'"
         )
         
         await msg.answer(
             f"❌ Вы отказались от заявки #{order.number}\n\n"
-            f"⚠️ Свободный мастер не найден.\n"
-            f"Заявка будет назначена администратором.",
+            f"⚠️ Свободный мастер пока не найден.\n"
+            f"Заявка будет назначена другому мастеру автоматически.",
             reply_markup=master_main_kb()
         )
     
@@ -723,9 +737,9 @@ async def reject_order_with_reason(
 @router.callback_query(F.data == "back_to_orders")
 async def back_to_orders(callback: CallbackQuery, master: Master, master_service: MasterService):
     """Вернуться к списку заявок"""
-    orders = await master_service.get_master_orders(master.id)
+    overview = await orders_overview(master_service, master.id)
     
-    if not orders:
+    if overview is None:
         await callback.message.edit_text(
             "📋 У вас пока нет заявок.\n"
             "Ожидайте назначения от администратора.",
@@ -734,25 +748,8 @@ async def back_to_orders(callback: CallbackQuery, master: Master, master_service
         await callback.answer()
         return
     
-    text = "📋 Ваши заявки:\n\n"
-    active = [o for o in orders if o.status in [OrderStatus.new, OrderStatus.confirmed, OrderStatus.in_progress, OrderStatus.arrived]]
-    
-    if active:
-        text += "🔄 Активные:\n"
-        for order in active[:5]:
-            emoji = get_status_emoji(order.status.value)
-            text += (
-                f"{emoji} #{order.number}\n"
-                f" Клиент: {order.client_name}\n"
-                f" Адрес: {order.address}\n"
-                f" Время: {order.datetime.strftime('%d.%m %H:%M')}\n\n"
-            )
-    
-    completed = [o for o in orders if o.status == OrderStatus.completed]
-    if completed:
-        text += f"\n✅ Завершено: {len(completed)}"
-    
-    await callback.message.edit_text(text, reply_markup=master_orders_kb(bool(active)))
+    text, has_active = overview
+    await callback.message.edit_text(text, reply_markup=master_orders_kb(has_active))
     await callback.answer()
 
 # ==================== Сообщение админу ====================
@@ -4,14 +4,15 @@ from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from config import BOT_TOKEN, LOG_LEVEL, ADMIN_IDS
+from config import BOT_TOKEN, LOG_LEVEL
 from middlewares import AuthMiddleware
 from handlers import admin, master, common
 from database.engine import init_db, DatabaseManager, get_session
 
 from core.dependencies import ServiceMiddleware
-from models import OrderStatus
-from services.order_service import OrderService
+from services.dispatcher import dispatcher
+from services.schedule_compactor import schedule_compactor
+from services.skill_service import SkillService
 
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
@@ -19,69 +20,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
-async def auto_assign_pending_orders(bot):
-    """Background task: Check and assign pending orders"""
-    try:
-        async with get_session() as session:
-            order_service = OrderService(session)
-            
-            # Faqat tayinlanmagan "new" statusdagi zayvkalarni olamiz
-            pending_orders = await order_service.get_orders_by_filter(status=OrderStatus.new)
-            
-            assigned_count = 0
-            for order in pending_orders:
-                # MUHIM: Avval assignment borligini tekshiramiz
-                existing_assignment = await order_service.assignment_repo.get_by_order(order.id)
-                if existing_assignment:
-                    # Bu zayvka allaqachon tayinlangan, o'tkazib yuboramiz
-                    continue
-                    
-                
-                # Master topishga harakat qilamiz
-                master = await order_service.assign_to_master(order.id)
-                if master:
-                    assigned_count += 1
-                    
-                    # Masterga xabar yuboramiz
-                    from core.keyboards import order_status_kb
-                    try:
-                        await bot.send_message(
-                            master.telegram_id,
-                            f"🆕 Новая заявка #{order.number}!\n\n"
-                            f"👤 Клиент: {order.client_name}\n"
-                            f"📞 Телефон: {order.phone}\n"
-                            f"📍 Адрес: {order.address}\n"
-                            f"📅 Время: {order.datetime.strftime('%d.%m.%Y %H:%M')}\n"
-                            f"🔧 Техника: {order.type} {order.brand} {order.model}\n"
-                            f"💬 Проблема: {order.comment}",
-                            reply_markup=order_status_kb(order.id, order.status)
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to notify master {master.id}: {e}")
-                    
-                    # Adminlarga xabar
-                    for admin_id in ADMIN_IDS:
-                        try:
-                            await bot.send_message(
-                                admin_id, 
-                                f"🤖 Автоматически назначена заявка #{order.number} мастеру {master.name}!"
-                            )
-                        except Exception:
-                            pass
-            
-            if assigned_count > 0:
-                logger.info(f"Scheduler assigned {assigned_count} pending orders")
-    
-    except Exception as e:
-        logger.error(f"Error in auto_assign_pending_orders: {e}")
+scheduler = AsyncIOScheduler()
 
 
 async def on_startup(bot: Bot):
     await init_db()
+    
+    # Каталог навыков в памяти (клавиатуры выбора навыков без запросов к БД)
+    async with get_session() as session:
+        await SkillService(session).load_catalog()
+    
+    # Фоновое автоназначение заказов из очереди
+    dispatcher.start(bot, scheduler)
+    # Ночная очистка прошедших дат графика мастеров
+    schedule_compactor.start(scheduler)
+    scheduler.start()
 
 
 async def on_shutdown(bot: Bot):
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
     await DatabaseManager.close()
 
 
@@ -94,6 +52,7 @@ async def main():
 
     dp.message.middleware(ServiceMiddleware())
     dp.callback_query.middleware(ServiceMiddleware())
+    dp.inline_query.middleware(ServiceMiddleware())
 
     
     dp.include_router(common.router)
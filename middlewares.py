@@ -1,10 +1,11 @@
 from typing import Callable, Awaitable, Dict, Any
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject, Message, CallbackQuery, Update
+from aiogram.types import TelegramObject, Message, CallbackQuery, InlineQuery, Update
 
 from config import ADMIN_IDS
-from database.engine import get_session
+from database.engine import UnitOfWork
 from repositories.master import MasterRepository
+from core.role_cache import role_cache, MasterSnapshot, MISSING
 
 
 class AuthMiddleware(BaseMiddleware):
@@ -20,24 +21,34 @@ class AuthMiddleware(BaseMiddleware):
                 actual_event = event.message
             elif event.callback_query:
                 actual_event = event.callback_query
+            elif event.inline_query:
+                actual_event = event.inline_query
             else:
                 return await handler(event, data)
         else:
             actual_event = event
         
         
-        if not isinstance(actual_event, (Message, CallbackQuery)):
+        if not isinstance(actual_event, (Message, CallbackQuery, InlineQuery)):
             return await handler(event, data)
         
         user_id = actual_event.from_user.id
         
-        if user_id in ADMIN_IDS:
-            data["role"] = "admin"
-            return await handler(event, data)
-        
-        async with get_session() as session:
-            master_repo = MasterRepository(session)
-            master = await master_repo.get_by_telegram_id(user_id)
+        # Одна сессия на апдейт: ее же используют сервисы (ServiceMiddleware)
+        async with UnitOfWork() as uow:
+            data["uow"] = uow
+            
+            if user_id in ADMIN_IDS:
+                data["role"] = "admin"
+                return await handler(event, data)
+            
+            # Кэш ролей: повторные апдейты (и спам от незнакомых id) без запроса к БД
+            master = role_cache.get(user_id)
+            if master is MISSING:
+                master_repo = MasterRepository(uow.session)
+                found = await master_repo.get_by_telegram_id(user_id)
+                master = MasterSnapshot.from_master(found) if found else None
+                role_cache.put(user_id, master)
             
             if master:
                 data["role"] = "master"
@@ -51,6 +62,8 @@ class AuthMiddleware(BaseMiddleware):
                 "Обратитесь к администратору для получения доступа.\n"
                 f"Ваш ID: {user_id}"
             )
+        elif isinstance(actual_event, InlineQuery):
+            await actual_event.answer([], cache_time=60, is_personal=True)
         else:
             await actual_event.answer("❌ Доступ запрещен!", show_alert=True)
         
@@ -0,0 +1,66 @@
+"""hot query indexes
+
+Revision ID: 3b9f1e7c2a4d
+Revises: 85eb574796a1
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f1e7c2a4d'
+down_revision: Union[str, Sequence[str], None] = '85eb574796a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, таблица, колонки) - совпадают с Index в models
+INDEXES = (
+    ('ix_orders_status_datetime', 'orders', 'status, datetime, id'),
+    ('ix_orders_datetime_id', 'orders', 'datetime, id'),
+    ('ix_orders_number_pattern', 'orders', 'number text_pattern_ops'),
+    ('ix_assignments_master_order', 'assignments', 'master_id, order_id'),
+    ('ix_master_skills_master_id', 'master_skills', 'master_id'),
+    ('ix_master_skills_skill_id', 'master_skills', 'skill_id'),
+    ('ix_order_skills_order_id', 'order_skills', 'order_id'),
+    ('ix_order_skills_skill_id', 'order_skills', 'skill_id'),
+)
+
+# Одиночные индексы из index=True в models - есть только в базах, созданных
+# через create_all (ни одна миграция их не создает). Покрыты составными
+REPLACED_INDEXES = (
+    ('ix_orders_status', 'orders', 'status'),
+    ('ix_orders_datetime', 'orders', 'datetime'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # order_skills раньше создавалась только через create_all
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_skills (
+            order_id INTEGER REFERENCES orders (id) ON DELETE CASCADE,
+            skill_id INTEGER REFERENCES skills (id) ON DELETE CASCADE
+        )
+        """
+    )
+    # CONCURRENTLY нельзя внутри транзакции; IF NOT EXISTS - базы после create_all
+    # (и повтор после прерванной сборки: невалидный индекс нужно удалить вручную)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+        for name, _, _ in REPLACED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # REPLACED_INDEXES не восстанавливаются: в схеме ревизии 85eb574796a1 их нет
+    with op.get_context().autocommit_block():
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,33 @@
+"""master schedule slots archive
+
+Revision ID: 4e8c0a7d2f61
+Revises: b1f6e29d4c58
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8c0a7d2f61'
+down_revision: Union[str, Sequence[str], None] = 'b1f6e29d4c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('master_schedule_slots_archive',
+    sa.Column('master_id', sa.Integer(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('master_id', 'starts_at')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('master_schedule_slots_archive')
@@ -0,0 +1,49 @@
+"""order search indexes
+
+Revision ID: 5d2b7f4a9c13
+Revises: e7a3c5b19d82
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b7f4a9c13'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c5b19d82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, колонка) - GIN-индексы gin_trgm_ops, совпадают с Index в models
+TRGM_INDEXES = (
+    ('ix_orders_client_name_trgm', 'client_name'),
+    ('ix_orders_address_trgm', 'address'),
+    ('ix_orders_phone_digits_trgm', 'phone_digits'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Колонка без значения по умолчанию - без перезаписи таблицы.
+    # Заполнение пачками: python scripts/backfill_phones.py
+    op.add_column('orders', sa.Column('phone_digits', sa.String(), nullable=True))
+    # Новые индексы - вне транзакции, без блокировки записи в orders
+    with op.get_context().autocommit_block():
+        for name, column in TRGM_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON orders USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in TRGM_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.drop_column('orders', 'phone_digits')
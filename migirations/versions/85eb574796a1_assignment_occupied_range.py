@@ -0,0 +1,68 @@
+"""assignment occupied range
+
+Revision ID: 85eb574796a1
+Revises: fca5865adc1c
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85eb574796a1'
+down_revision: Union[str, Sequence[str], None] = 'fca5865adc1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Должен совпадать с ASSIGNMENT_BUFFER_HOURS на момент миграции
+BUFFER_HOURS = 4
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('assignments', sa.Column('occupied', postgresql.TSRANGE(), nullable=True))
+
+    # Интервалы занятости для активных заказов
+    op.execute(
+        f"""
+        UPDATE assignments a
+        SET occupied = tsrange(o.datetime, o.datetime + interval '{BUFFER_HOURS} hours', '[)')
+        FROM orders o
+        WHERE o.id = a.order_id
+          AND o.status IN ('new', 'confirmed', 'in_progress', 'arrived')
+        """
+    )
+    # Уже существующие пересечения: интервал остается у более раннего назначения,
+    # у остальных обнуляется (заказы не трогаем, только снимаем их с проверки)
+    op.execute(
+        """
+        UPDATE assignments a
+        SET occupied = NULL
+        WHERE a.occupied IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM assignments b
+              WHERE b.master_id = a.master_id
+                AND b.id < a.id
+                AND b.occupied && a.occupied
+          )
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE assignments
+        ADD CONSTRAINT ex_assignments_master_occupied
+        EXCLUDE USING gist (master_id WITH =, occupied WITH &&)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_assignments_master_occupied', 'assignments', type_='exclude')
+    op.drop_column('assignments', 'occupied')
@@ -0,0 +1,37 @@
+"""order phone e164
+
+Revision ID: a86e0d3f5b27
+Revises: 5d2b7f4a9c13
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a86e0d3f5b27'
+down_revision: Union[str, Sequence[str], None] = '5d2b7f4a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка без значения по умолчанию - без перезаписи таблицы.
+    # Заполнение пачками: python scripts/backfill_phones.py
+    op.add_column('orders', sa.Column('phone_e164', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_phone_e164_datetime "
+            "ON orders (phone_e164, datetime)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_orders_phone_e164_datetime")
+    op.drop_column('orders', 'phone_e164')
@@ -0,0 +1,73 @@
+"""master schedule slots
+
+Revision ID: b1f6e29d4c58
+Revises: a86e0d3f5b27
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1f6e29d4c58'
+down_revision: Union[str, Sequence[str], None] = 'a86e0d3f5b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('master_schedule_slots',
+    sa.Column('master_id', sa.Integer(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['master_id'], ['masters.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('master_id', 'starts_at')
+    )
+    op.create_index('ix_master_schedule_slots_starts_at', 'master_schedule_slots', ['starts_at'], unique=False)
+
+    # Перенос из masters.schedule, оба формата:
+    #   {"2025-10-11": {"13:00": "завершено"}} - статус из значения
+    #   {"2025-10-11": ["13:00", "15:00"]}     - список занятых слотов ("busy")
+    # Время "HH:MM" или "HH:MM:SS" (секунды отбрасываются), битые записи пропускаются.
+    # Ключи, сводящиеся к одному слоту ("13:00" и "13:00:00"), схлопываются в одну
+    # строку: приоритет у статуса, который блокирует слот, затем у явного статуса
+    # перед "busy" из списка
+    op.execute(
+        r"""
+        INSERT INTO master_schedule_slots (master_id, starts_at, status)
+        SELECT DISTINCT ON (s.master_id, s.starts_at) s.master_id, s.starts_at, s.status
+        FROM (
+            SELECT m.id AS master_id,
+                   (d.key || ' ' || substring(t.time from '^\d{1,2}:\d{2}'))::timestamp AS starts_at,
+                   t.status
+            FROM masters m
+            CROSS JOIN LATERAL jsonb_each(
+                CASE WHEN jsonb_typeof(m.schedule::jsonb) = 'object' THEN m.schedule::jsonb ELSE '{}'::jsonb END
+            ) d
+            CROSS JOIN LATERAL (
+                SELECT e.key AS time, e.value #>> '{}' AS status
+                FROM jsonb_each(CASE WHEN jsonb_typeof(d.value) = 'object' THEN d.value ELSE '{}'::jsonb END) e
+                UNION ALL
+                SELECT a.value #>> '{}', 'busy'
+                FROM jsonb_array_elements(CASE WHEN jsonb_typeof(d.value) = 'array' THEN d.value ELSE '[]'::jsonb END) a
+            ) t
+            WHERE m.schedule IS NOT NULL
+              AND d.key ~ '^\d{4}-\d{2}-\d{2}$'
+              AND t.time ~ '^\d{1,2}:\d{2}'
+              AND t.status IS NOT NULL
+        ) s
+        ORDER BY s.master_id, s.starts_at, s.status = 'free', s.status = 'busy', s.status
+        ON CONFLICT (master_id, starts_at) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # masters.schedule не изменялся - данные до миграции остаются в нем
+    op.drop_index('ix_master_schedule_slots_starts_at', table_name='master_schedule_slots')
+    op.drop_table('master_schedule_slots')
@@ -0,0 +1,42 @@
+"""order number counters
+
+Revision ID: c41d8a2e6f90
+Revises: 3b9f1e7c2a4d
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8a2e6f90'
+down_revision: Union[str, Sequence[str], None] = '3b9f1e7c2a4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_number_counters',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('last_seq', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    # Счетчики продолжают существующие номера YYYY-MM-DD-NNN
+    op.execute(
+        r"""
+        INSERT INTO order_number_counters (day, last_seq)
+        SELECT left(number, 10)::date, max(substr(number, 12)::int)
+        FROM orders
+        WHERE number ~ '^\d{4}-\d{2}-\d{2}-\d+$'
+        GROUP BY left(number, 10)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_number_counters')
@@ -0,0 +1,44 @@
+"""order status counters
+
+Revision ID: e7a3c5b19d82
+Revises: c41d8a2e6f90
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c5b19d82'
+down_revision: Union[str, Sequence[str], None] = 'c41d8a2e6f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_status_counters',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='orderstatus', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    # Начальные значения по существующим заказам (дальше их ведет OrderService)
+    op.execute(
+        """
+        INSERT INTO order_status_counters (day, status, count)
+        SELECT datetime::date, status, count(*)
+        FROM orders
+        WHERE status IS NOT NULL AND datetime IS NOT NULL
+        GROUP BY datetime::date, status
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_status_counters')
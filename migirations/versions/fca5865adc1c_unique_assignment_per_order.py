@@ -0,0 +1,37 @@
+"""unique assignment per order
+
+Revision ID: fca5865adc1c
+Revises: d831eeda52be
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fca5865adc1c'
+down_revision: Union[str, Sequence[str], None] = 'd831eeda52be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубли назначений (гонка нескольких процессов): оставляем последнее
+    op.execute(
+        """
+        DELETE FROM assignments a
+        USING assignments newer
+        WHERE a.order_id = newer.order_id
+          AND a.id < newer.id
+        """
+    )
+    op.create_unique_constraint('uq_assignments_order_id', 'assignments', ['order_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_assignments_order_id', 'assignments', type_='unique')
@@ -7,10 +7,12 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import (
     Column, Integer, String, DateTime, Float, Text, 
-    Boolean, JSON, BigInteger, ForeignKey, Table, Enum as SQLEnum
+    Boolean, JSON, BigInteger, Date, ForeignKey, Table, UniqueConstraint, Index, Enum as SQLEnum
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSRANGE, ExcludeConstraint
+from sqlalchemy.orm import deferred, relationship
 from database.base import BaseModel
+from core.skill_catalog import skill_catalog
 
 
 # ==================== ENUMS ====================
@@ -24,19 +26,73 @@ class OrderStatus(PyEnum):
     rejected = "rejected"
 
 
+# Статусы, при которых заказ занимает время мастера
+ACTIVE_ORDER_STATUSES = (
+    OrderStatus.new,
+    OrderStatus.confirmed,
+    OrderStatus.in_progress,
+    OrderStatus.arrived,
+)
+
+
 # ==================== MANY-TO-MANY TABLES ====================
 master_skills = Table(
     "master_skills",
     BaseModel.metadata,
     Column("master_id", Integer, ForeignKey("masters.id", ondelete="CASCADE")),
-    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"))
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE")),
+    Index("ix_master_skills_master_id", "master_id"),
+    Index("ix_master_skills_skill_id", "skill_id")
 )
 
 order_skills = Table(
     "order_skills",
     BaseModel.metadata,
     Column("order_id", Integer, ForeignKey("orders.id", ondelete="CASCADE")),
-    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"))
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE")),
+    Index("ix_order_skills_order_id", "order_id"),
+    Index("ix_order_skills_skill_id", "skill_id")
+)
+
+
+# Последний порядковый номер заказа за день (номер: YYYY-MM-DD-NNN)
+order_number_counters = Table(
+    "order_number_counters",
+    BaseModel.metadata,
+    Column("day", Date, primary_key=True),
+    Column("last_seq", Integer, nullable=False)
+)
+
+
+# Количество заказов по дню (дата заказа) и статусу; обновляется в транзакции
+# изменения статуса (OrderService), чтобы итоги не требовали COUNT(*)
+order_status_counters = Table(
+    "order_status_counters",
+    BaseModel.metadata,
+    Column("day", Date, primary_key=True),
+    Column("status", SQLEnum(OrderStatus), primary_key=True),
+    Column("count", Integer, nullable=False, default=0)
+)
+
+
+# График мастера: одна строка на слот (статус "free" - свободен, остальные - занят)
+master_schedule_slots = Table(
+    "master_schedule_slots",
+    BaseModel.metadata,
+    Column("master_id", Integer, ForeignKey("masters.id", ondelete="CASCADE"), primary_key=True),
+    Column("starts_at", DateTime, primary_key=True),
+    Column("status", String, nullable=False),
+    # Занятость всех мастеров на отрезок времени
+    Index("ix_master_schedule_slots_starts_at", "starts_at")
+)
+
+# Прошедшие слоты старше SCHEDULE_RETENTION_DAYS (переносит ScheduleCompactor)
+master_schedule_slots_archive = Table(
+    "master_schedule_slots_archive",
+    BaseModel.metadata,
+    Column("master_id", Integer, primary_key=True),
+    Column("starts_at", DateTime, primary_key=True),
+    Column("status", String, nullable=False)
 )
 
 
@@ -64,7 +120,9 @@ class Master(BaseModel):
     telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
     phone = Column(String)
     is_online = Column(Boolean, default=False)
-    schedule = Column(JSON, default=dict)  # {"2025-10-11": ["13:00", "15:00"]}
+    # Устарело: график хранится в master_schedule_slots (колонка не читается и не пишется).
+    # Не загружается вместе с мастером, прошедшие даты вычищает ScheduleCompactor
+    schedule = deferred(Column(JSON, default=dict))
     
     # Relationships
     skills = relationship("Skill", secondary=master_skills, back_populates="masters")
@@ -72,28 +130,57 @@ class Master(BaseModel):
     
     def __repr__(self):
         return f"<Master(name={self.name}, telegram_id={self.telegram_id})>"
+    
+    @property
+    def skill_mask(self) -> int:
+        """Навыки мастера битовой маской (skills должны быть загружены)"""
+        return skill_catalog.mask_of(self.skills)
 
 
 class Order(BaseModel):
     """Заявка/заказ"""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Списки по статусу и общий список: keyset по (datetime, id)
+        Index("ix_orders_status_datetime", "status", "datetime", "id"),
+        Index("ix_orders_datetime_id", "datetime", "id"),
+        # Номера за день и поиск по началу номера: number LIKE 'YYYY-MM-DD-%'
+        Index("ix_orders_number_pattern", "number", postgresql_ops={"number": "text_pattern_ops"}),
+        # Поиск по подстроке (ILIKE '%...%'), нужен pg_trgm
+        Index(
+            "ix_orders_client_name_trgm", "client_name",
+            postgresql_using="gin", postgresql_ops={"client_name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_orders_address_trgm", "address",
+            postgresql_using="gin", postgresql_ops={"address": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_orders_phone_digits_trgm", "phone_digits",
+            postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}
+        ),
+        # История клиента: заказы по точному номеру, новые сверху
+        Index("ix_orders_phone_e164_datetime", "phone_e164", "datetime"),
+    )
     
     number = Column(String, unique=True, nullable=False, index=True)
     
     # Клиент
     client_name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
+    phone_digits = Column(String, nullable=True)  # только цифры телефона (поиск)
+    phone_e164 = Column(String, nullable=True)  # +998901234567 (история клиента)
     address = Column(String, nullable=False)
     
     # Время и техника
-    datetime = Column(DateTime, nullable=False, index=True)
+    datetime = Column(DateTime, nullable=False)
     type = Column(String)  # Тип техники (стиралка, холодильник)
     brand = Column(String)
     model = Column(String)
     comment = Column(Text)
     
     # Статус и финансы
-    status = Column(SQLEnum(OrderStatus), default=OrderStatus.new, index=True)
+    status = Column(SQLEnum(OrderStatus), default=OrderStatus.new)
     work_amount = Column(Float, default=0.0)
     expenses = Column(Float, default=0.0)
     profit = Column(Float, default=0.0)
@@ -109,6 +196,11 @@ class Order(BaseModel):
     def __repr__(self):
         return f"<Order(number={self.number}, status={self.status.value})>"
     
+    @property
+    def skill_mask(self) -> int:
+        """Требуемые навыки битовой маской (required_skills должны быть загружены)"""
+        return skill_catalog.mask_of(self.required_skills)
+    
     def calculate_profit(self):
         """Вычислить прибыль"""
         self.profit = self.work_amount - self.expenses
@@ -117,10 +209,25 @@ class Order(BaseModel):
 class Assignment(BaseModel):
     """Назначение заказа мастеру"""
     __tablename__ = "assignments"
+    __table_args__ = (
+        # У заказа не больше одного назначения (защита от двойного назначения)
+        UniqueConstraint("order_id", name="uq_assignments_order_id"),
+        # Интервалы занятости одного мастера не пересекаются (нужен btree_gist)
+        ExcludeConstraint(
+            ("master_id", "="),
+            ("occupied", "&&"),
+            name="ex_assignments_master_occupied",
+            using="gist"
+        ),
+        # Заказы мастера (order_id покрыт уникальным ограничением)
+        Index("ix_assignments_master_order", "master_id", "order_id"),
+    )
     
     order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     master_id = Column(Integer, ForeignKey("masters.id", ondelete="CASCADE"), nullable=False)
     assigned_at = Column(DateTime, default=datetime.utcnow)
+    # [время заказа, + буфер) пока заказ активен, NULL - заказ завершен/отклонен
+    occupied = Column(TSRANGE, nullable=True)
     
     # Relationships
     order = relationship("Order", back_populates="assignments")
@@ -133,10 +240,15 @@ class Assignment(BaseModel):
 # Экспорт всех моделей
 __all__ = [
     'OrderStatus',
+    'ACTIVE_ORDER_STATUSES',
     'Skill',
     'Master',
     'Order',
     'Assignment',
     'master_skills',
-    'order_skills'
+    'order_skills',
+    'order_number_counters',
+    'order_status_counters',
+    'master_schedule_slots',
+    'master_schedule_slots_archive'
 ]
\ No newline at end of file
@@ -1,11 +1,23 @@
-from typing import Optional, List
-from datetime import date, datetime
-from sqlalchemy import select, and_
+from typing import Optional, List, Tuple, Set, Dict
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, and_, update, func
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from config import ASSIGNMENT_BUFFER_HOURS
 from database.base import BaseRepository
-from models import Assignment, Order, OrderStatus
+from models import Assignment, Master, Order, OrderStatus, ACTIVE_ORDER_STATUSES
+
+
+def occupied_range(order_datetime: datetime, buffer_hours: int = ASSIGNMENT_BUFFER_HOURS) -> Range:
+    """
+    Интервал занятости мастера заказом: [время, время + буфер).
+    Интервалы двух заказов пересекаются ровно тогда, когда между ними меньше буфера.
+    """
+    return Range(order_datetime, order_datetime + timedelta(hours=buffer_hours), bounds="[)")
 
 
 class AssignmentRepository(BaseRepository[Assignment]):
@@ -23,15 +35,6 @@ class AssignmentRepository(BaseRepository[Assignment]):
         )
         return result.scalar_one_or_none()
     
-    async def get_by_order(self, order_id: int) -> Optional[Assignment]:
-        """Получить назначение по заказу"""
-        result = await self.session.execute(
-            select(Assignment)
-            .options(selectinload(Assignment.master))
-            .where(Assignment.order_id == order_id)
-        )
-        return result.scalar_one_or_none()
-    
     async def get_active_for_master(self, master_id: int) -> List[Assignment]:
         """Получить активные назначения мастера"""
         result = await self.session.execute(
@@ -53,6 +56,66 @@ class AssignmentRepository(BaseRepository[Assignment]):
         )
         return list(result.scalars().all())
     
+    async def get_active_rows(self) -> List[Tuple[int, int, datetime]]:
+        """
+        Все активные назначения одним запросом: (order_id, master_id, время заказа).
+        Используется для построения индекса занятости мастеров.
+        """
+        result = await self.session.execute(
+            select(Assignment.order_id, Assignment.master_id, Order.datetime)
+            .join(Assignment.order)
+            .where(Order.status.in_(ACTIVE_ORDER_STATUSES))
+        )
+        return [tuple(row) for row in result.all()]
+    
+    async def create_for_order(self, order: Order, master_id: int) -> Assignment:
+        """
+        Назначение с интервалом занятости (для активного заказа).
+        Пересечение с другим заказом мастера -> ValueError (exclusion constraint).
+        """
+        occupied = occupied_range(order.datetime) if order.status in ACTIVE_ORDER_STATUSES else None
+        try:
+            async with self.session.begin_nested():
+                return await self.create(order_id=order.id, master_id=master_id, occupied=occupied)
+        except IntegrityError:
+            raise ValueError("Мастер занят в это время (другой заказ в пределах буфера)")
+    
+    async def set_occupied(self, order_id: int, order_datetime: Optional[datetime]):
+        """Занять время мастера (order_datetime) или освободить его (None)"""
+        occupied = occupied_range(order_datetime) if order_datetime else None
+        try:
+            async with self.session.begin_nested():
+                await self.session.execute(
+                    update(Assignment)
+                    .where(Assignment.order_id == order_id)
+                    .values(occupied=occupied)
+                )
+        except IntegrityError:
+            raise ValueError("Мастер занят в это время (другой заказ в пределах буфера)")
+    
+    async def has_conflict(self, master_id: int, order_datetime: datetime) -> bool:
+        """Есть ли у мастера активный заказ ближе чем на буфер (индекс GiST)"""
+        result = await self.session.execute(
+            select(Assignment.id)
+            .where(
+                and_(
+                    Assignment.master_id == master_id,
+                    Assignment.occupied.overlaps(occupied_range(order_datetime))
+                )
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+    
+    async def get_busy_master_ids(self, order_datetime: datetime) -> Set[int]:
+        """Мастера, занятые другими заказами в пределах буфера (один запрос на всех)"""
+        result = await self.session.execute(
+            select(Assignment.master_id)
+            .where(Assignment.occupied.overlaps(occupied_range(order_datetime)))
+            .distinct()
+        )
+        return set(result.scalars().all())
+    
     async def get_by_date_range(self, date_from: date, date_to: date) -> List[Assignment]:
         """Получить назначения за период"""
         query = select(Assignment).join(Assignment.order).where(
@@ -65,6 +128,40 @@ class AssignmentRepository(BaseRepository[Assignment]):
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    async def get_master_totals(
+        self,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[Row]:
+        """
+        Количество и суммы заказов по мастерам (GROUP BY в БД):
+        id, name, orders_count, total_revenue, total_expenses, total_profit
+        """
+        query = (
+            select(
+                Master.id,
+                Master.name,
+                func.count().label("orders_count"),
+                func.coalesce(func.sum(Order.work_amount), 0.0).label("total_revenue"),
+                func.coalesce(func.sum(Order.expenses), 0.0).label("total_expenses"),
+                func.coalesce(func.sum(Order.profit), 0.0).label("total_profit")
+            )
+            .select_from(Assignment)
+            .join(Order, Order.id == Assignment.order_id)
+            .join(Master, Master.id == Assignment.master_id)
+            .group_by(Master.id, Master.name)
+            .order_by(Master.name, Master.id)
+        )
+        if status is not None:
+            query = query.where(Order.status == status)
+        if date_from is not None:
+            query = query.where(Order.datetime >= date_from)
+        if date_to is not None:
+            query = query.where(Order.datetime < date_to)
+        result = await self.session.execute(query)
+        return list(result.all())
+    
     async def get_all_assignments(self) -> List[Assignment]:
         """Получить все назначения"""
         result = await self.session.execute(
@@ -75,28 +172,31 @@ class AssignmentRepository(BaseRepository[Assignment]):
         )
         return list(result.scalars().all())
     
-    async def count_today_assignments(self, master_id: int) -> int:
+    async def get_load_counters(self, day: Optional[date] = None) -> Dict[int, Dict[str, int]]:
         """
-        Подсчитать количество АКТИВНЫХ и НОВЫХ заказов мастера на сегодня
-        (исключая rejected и completed)
+        Загрузка всех мастеров одним GROUP BY:
+        {master_id: {"today": активных заказов на день, "active": всего активных}}
+        Мастера без активных заказов в результат не попадают.
         """
-        today = date.today()
+        day_start = datetime.combine(day or date.today(), datetime.min.time())
+        today_filter = and_(
+            Order.datetime >= day_start,
+            Order.datetime < day_start + timedelta(days=1)
+        )
         result = await self.session.execute(
-            select(Assignment)
-            .join(Assignment.order)
-            .where(
-                and_(
-                    Assignment.master_id == master_id,
-                    Order.status.in_([
-                        OrderStatus.new,  # Добавляем new статус
-                        OrderStatus.confirmed,
-                        OrderStatus.in_progress,
-                        OrderStatus.arrived
-                    ])
-                )
+            select(
+                Assignment.master_id,
+                func.count(Assignment.id).filter(today_filter),
+                func.count(Assignment.id)
             )
+            .join(Assignment.order)
+            .where(Order.status.in_(ACTIVE_ORDER_STATUSES))
+            .group_by(Assignment.master_id)
         )
-        return len(list(result.scalars().all()))
+        return {
+            master_id: {"today": today, "active": active}
+            for master_id, today, active in result.all()
+        }
     
     async def get_by_master(self, master_id: int) -> List[Assignment]:
         """Получить все назначения мастера"""
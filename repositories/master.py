@@ -1,10 +1,11 @@
 from typing import Optional, List
-from datetime import datetime, timedelta
-from sqlalchemy import and_, select
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from database.base import BaseRepository
+from repositories.schedule import ScheduleRepository
 from models import Assignment, Master, Order, OrderStatus, master_skills
 
 
@@ -54,68 +55,48 @@ class MasterRepository(BaseRepository[Master]):
         )
         return list(result.scalars().all())
     
-    async def is_free_at(self, master_id: int, dt: datetime) -> bool:
-        """Проверить свободен ли мастер в указанное время"""
-        master = await self.get(master_id)
-        if not master or not master.schedule:
-            return True
-        
-        date_str = dt.strftime("%Y-%m-%d")
-        time_str = dt.strftime("%H:%M")
-        
-        if date_str in master.schedule:
-            return time_str not in master.schedule[date_str]
-        return True
-    
-    async def update_schedule(self, master_id: int, dt: datetime, status: str):
-        """Обновить график мастера"""
-        master = await self.get(master_id)
-        if not master:
-            return
-        
-        if not master.schedule:
-            master.schedule = {}
-        
-        date_str = dt.strftime("%Y-%m-%d")
-        time_str = dt.strftime("%H:%M")
-        
-        if date_str not in master.schedule:
-            master.schedule[date_str] = []
-        
-        if status == "busy" and time_str not in master.schedule[date_str]:
-            master.schedule[date_str].append(time_str)
-        elif status == "free" and time_str in master.schedule[date_str]:
-            master.schedule[date_str].remove(time_str)
-        
-        await self.session.flush()
-    
-    async def check_availability_with_buffer(
-        self, 
-        master_id: int, 
-        order_datetime: datetime, 
-        buffer_hours: int = 4
-    ) -> bool:
+    async def prune_legacy_schedule(self, after_id: int, before: date, limit: int) -> Optional[int]:
         """
-        Проверка доступности мастера с учетом буфера времени
-        (учитываем и new, и активные статусы)
+        Удалить из старого JSON-графика (masters.schedule) даты раньше before
+        у следующих limit мастеров с id > after_id. Возвращает последний
+        обработанный id или None, если мастеров больше нет.
         """
-        assignments = await self.get_active_assignments(master_id)
-        for assignment in assignments:
-            existing_time = assignment.order.datetime
-            time_diff = abs((order_datetime - existing_time).total_seconds() / 3600)
-            if time_diff < buffer_hours:
-                return False
-        
-        # Проверяем график мастера
-        date_str = order_datetime.strftime("%Y-%m-%d")
-        time_str = order_datetime.strftime("%H:%M")
-        schedule = (await self.get(master_id)).schedule or {}
-        
-        if date_str in schedule and time_str in schedule[date_str]:
-            return schedule[date_str][time_str] == "free"
-        
-        return True
-
+        result = await self.session.execute(
+            text(
+                r"""
+                WITH batch AS (
+                    SELECT id,
+                           CASE WHEN jsonb_typeof(schedule::jsonb) = 'object'
+                                THEN schedule::jsonb ELSE '{}'::jsonb END AS doc
+                    FROM masters
+                    WHERE id > :after_id
+                    ORDER BY id
+                    LIMIT :limit
+                ), pruned AS (
+                    UPDATE masters m
+                    SET schedule = (
+                        SELECT coalesce(jsonb_object_agg(d.key, d.value), '{}'::jsonb)
+                        FROM jsonb_each(batch.doc) d
+                        WHERE NOT (d.key ~ '^\d{4}-\d{2}-\d{2}$' AND d.key < :before)
+                    )::json
+                    FROM batch
+                    WHERE m.id = batch.id
+                      AND EXISTS (
+                          SELECT 1 FROM jsonb_object_keys(batch.doc) k
+                          WHERE k ~ '^\d{4}-\d{2}-\d{2}$' AND k < :before
+                      )
+                )
+                SELECT max(id) FROM batch
+                """
+            ),
+            {"after_id": after_id, "limit": limit, "before": before.isoformat()}
+        )
+        return result.scalar()
+    
+    async def is_free_at(self, master_id: int, dt: datetime) -> bool:
+        """Проверить свободен ли мастер в указанное время (по графику)"""
+        return await ScheduleRepository(self.session).is_free(master_id, dt)
+    
     async def get_active_assignments(self, master_id: int) -> List[Assignment]:
         """
         Получить все назначения мастера, включая new
@@ -1,11 +1,34 @@
-from typing import Optional, List
+from typing import Dict, Optional, List, Sequence, Tuple
 from datetime import datetime, date, timedelta
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from database.base import BaseRepository
-from models import Order, OrderStatus
+from models import Order, OrderStatus, Assignment, Master, order_number_counters, order_status_counters
+
+
+# Колонки строки списка заявок: без work_description/work_photos и навыков
+LIST_COLUMNS = (
+    Order.id,
+    Order.number,
+    Order.client_name,
+    Order.phone,
+    Order.type,
+    Order.brand,
+    Order.model,
+    Order.status,
+    Order.datetime,
+    Order.address,
+    Order.profit,
+)
+
+
+def escape_like(value: str) -> str:
+    """Экранировать спецсимволы LIKE (\\, %, _) в пользовательском вводе"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class OrderRepository(BaseRepository[Order]):
@@ -71,21 +94,76 @@ class OrderRepository(BaseRepository[Order]):
         result = await self.session.execute(query.order_by(Order.datetime))
         return list(result.scalars().all())
     
-    async def get_max_number_for_date(self, order_date: date) -> int:
-        """Получить максимальный sequential номер заказа за дату"""
-        date_str = order_date.strftime('%Y-%m-%d')
+    def _unassigned_query(
+        self,
+        order_ids: Optional[List[int]],
+        statuses: Tuple[OrderStatus, ...],
+        from_datetime: Optional[datetime]
+    ):
+        query = (
+            select(Order)
+            .outerjoin(Assignment, Assignment.order_id == Order.id)
+            .where(and_(Order.status.in_(statuses), Assignment.id.is_(None)))
+            .options(selectinload(Order.required_skills))
+            .order_by(Order.datetime)
+        )
+        if order_ids is not None:
+            query = query.where(Order.id.in_(order_ids))
+        if from_datetime is not None:
+            query = query.where(Order.datetime >= from_datetime)
+        return query
+    
+    async def get_unassigned(
+        self,
+        order_ids: Optional[List[int]] = None,
+        statuses: Tuple[OrderStatus, ...] = (OrderStatus.new,),
+        from_datetime: Optional[datetime] = None
+    ) -> List[Order]:
+        """Заказы без назначенного мастера (с навыками), по времени визита"""
+        result = await self.session.execute(
+            self._unassigned_query(order_ids, statuses, from_datetime)
+        )
+        return list(result.scalars().all())
+    
+    async def claim_unassigned(
+        self,
+        order_ids: Optional[List[int]] = None,
+        statuses: Tuple[OrderStatus, ...] = (OrderStatus.new,),
+        from_datetime: Optional[datetime] = None
+    ) -> List[Order]:
+        """
+        То же, что get_unassigned, но строки заказов блокируются до конца транзакции
+        (FOR UPDATE SKIP LOCKED): заказы, которые уже взял другой процесс, пропускаются.
+        """
+        result = await self.session.execute(
+            self._unassigned_query(order_ids, statuses, from_datetime)
+            .with_for_update(skip_locked=True, of=Order)
+        )
+        return list(result.scalars().all())
+    
+    async def get_for_update(self, order_id: int) -> Optional[Order]:
+        """Получить заказ с блокировкой строки до конца транзакции"""
         result = await self.session.execute(
-            select(func.max(Order.number))
-            .where(Order.number.like(f"{date_str}-%"))
-        )
-        max_number = result.scalar()
-        if max_number:
-            try:
-                seq = int(max_number.split('-')[-1])
-                return seq
-            except ValueError:
-                return 0
-        return 0
+            select(Order)
+            .where(Order.id == order_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+    
+    async def next_number_seq(self, order_date: date) -> int:
+        """
+        Следующий порядковый номер заказа за дату (один атомарный запрос).
+        Строка счетчика заблокирована до конца транзакции, поэтому при откате
+        номер не пропадает, а параллельные создания ждут коммита.
+        """
+        stmt = insert(order_number_counters).values(day=order_date, last_seq=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[order_number_counters.c.day],
+            set_={"last_seq": order_number_counters.c.last_seq + 1}
+        ).returning(order_number_counters.c.last_seq)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
     
     async def get_by_ids(self, order_ids: List[int]) -> List[Order]:
         """Получить заказы по списку ID"""
@@ -104,17 +182,6 @@ class OrderRepository(BaseRepository[Order]):
         result = await self.session.execute(query)
         return result.scalar_one()
 
-    async def get_by_date_range(self, start_date: date, end_date: date, limit: Optional[int] = None, offset: Optional[int] = 0) -> List[Order]:
-        """Получить заказы по диапазону дат с пагинацией"""
-        query = select(Order).where(
-            Order.datetime >= start_date,
-            Order.datetime <= end_date + timedelta(days=1)  # Assuming import from datetime
-        ).order_by(Order.datetime.desc())
-        if limit is not None:
-            query = query.limit(limit).offset(offset)
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
-    
 
     async def get_count_by_date_range(self, start_date: date, end_date: date) -> int:
         """Получить количество заказов по диапазону дат"""
@@ -124,4 +191,226 @@ class OrderRepository(BaseRepository[Order]):
         )
         result = await self.session.execute(query)
         return result.scalar_one()
-    
+
+    def _list_query(self):
+        """Строки списка: заказ + имя назначенного мастера одним запросом"""
+        return (
+            select(*LIST_COLUMNS, Master.name.label("master_name"))
+            .outerjoin(Assignment, Assignment.order_id == Order.id)
+            .outerjoin(Master, Master.id == Assignment.master_id)
+        )
+
+    async def get_totals(
+        self,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Row:
+        """Количество и суммы заказов (одна строка агрегатов из БД)"""
+        query = select(
+            func.count().label("orders_count"),
+            func.coalesce(func.sum(Order.work_amount), 0.0).label("total_revenue"),
+            func.coalesce(func.sum(Order.expenses), 0.0).label("total_expenses"),
+            func.coalesce(func.sum(Order.profit), 0.0).label("total_profit")
+        ).select_from(Order)
+        query = self._filter_query(query, status, date_from, date_to)
+        result = await self.session.execute(query)
+        return result.one()
+
+    def _filter_query(
+        self,
+        query,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        statuses: Optional[Sequence[OrderStatus]] = None
+    ):
+        if status is not None:
+            query = query.where(Order.status == status)
+        if statuses is not None:
+            query = query.where(Order.status.in_(statuses))
+        if date_from is not None:
+            query = query.where(Order.datetime >= date_from)
+        if date_to is not None:
+            query = query.where(Order.datetime < date_to)
+        return query
+
+    async def _keyset_page(
+        self,
+        query,
+        cursor: Optional[Tuple[datetime, int]],
+        backward: bool,
+        limit: Optional[int]
+    ) -> Tuple[List[Row], bool]:
+        key = tuple_(Order.datetime, Order.id)
+        if cursor is not None:
+            bound = tuple_(*cursor)
+            query = query.where(key > bound if backward else key < bound)
+        if backward:
+            query = query.order_by(Order.datetime.asc(), Order.id.asc())
+        else:
+            query = query.order_by(Order.datetime.desc(), Order.id.desc())
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        result = await self.session.execute(query)
+        orders = list(result.all())
+        has_more = limit is not None and len(orders) > limit
+        orders = orders[:limit]
+        if backward:
+            orders.reverse()
+        return orders, has_more
+
+    async def get_page(
+        self,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        backward: bool = False,
+        limit: int = 5
+    ) -> Tuple[List[Row], bool]:
+        """
+        Keyset-страница списка заказов в порядке (datetime, id) по убыванию.
+
+        cursor - (datetime, id) граничной строки: вперед - строки после нее,
+        назад (backward) - строки перед ней. Возвращает (строки LIST_COLUMNS +
+        master_name, есть ли еще строки в этом направлении); глубина страницы
+        на стоимость не влияет.
+        """
+        query = self._filter_query(self._list_query(), status, date_from, date_to)
+        return await self._keyset_page(query, cursor, backward, limit)
+
+    async def get_for_master(
+        self,
+        master_id: int,
+        statuses: Optional[Sequence[OrderStatus]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        backward: bool = False,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Row], bool]:
+        """
+        Заказы мастера одним запросом: фильтр по статусам и окну дат,
+        сортировка и keyset-страницы как в get_page (limit=None - все строки)
+        """
+        query = self._filter_query(
+            self._list_query().where(Assignment.master_id == master_id),
+            date_from=date_from,
+            date_to=date_to,
+            statuses=statuses
+        )
+        return await self._keyset_page(query, cursor, backward, limit)
+
+    async def count_for_master(
+        self,
+        master_id: int,
+        statuses: Optional[Sequence[OrderStatus]] = None
+    ) -> int:
+        """Количество заказов мастера по статусам"""
+        query = self._filter_query(
+            select(func.count())
+            .select_from(Assignment)
+            .join(Order, Order.id == Assignment.order_id)
+            .where(Assignment.master_id == master_id),
+            statuses=statuses
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def sum_profit_for_master(
+        self,
+        master_id: int,
+        statuses: Optional[Sequence[OrderStatus]] = None
+    ) -> float:
+        """Сумма прибыли по заказам мастера (SUM в БД)"""
+        query = self._filter_query(
+            select(func.coalesce(func.sum(Order.profit), 0.0))
+            .select_from(Assignment)
+            .join(Order, Order.id == Assignment.order_id)
+            .where(Assignment.master_id == master_id),
+            statuses=statuses
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    # ==================== Счетчики по статусам ====================
+    async def add_status_count(self, day: date, status: OrderStatus, delta: int):
+        """Изменить счетчик (день, статус) на delta (строка создается при первом заказе)"""
+        stmt = insert(order_status_counters).values(day=day, status=status, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[order_status_counters.c.day, order_status_counters.c.status],
+            set_={"count": order_status_counters.c.count + stmt.excluded.count}
+        )
+        await self.session.execute(stmt)
+
+    async def count_by_counters(
+        self,
+        status: Optional[OrderStatus] = None,
+        day: Optional[date] = None
+    ) -> int:
+        """Количество заказов из счетчиков (без сканирования orders)"""
+        query = select(func.coalesce(func.sum(order_status_counters.c.count), 0))
+        if status is not None:
+            query = query.where(order_status_counters.c.status == status)
+        if day is not None:
+            query = query.where(order_status_counters.c.day == day)
+        result = await self.session.execute(query)
+        return int(result.scalar_one())
+
+    async def get_status_counts(self, day: Optional[date] = None) -> Dict[OrderStatus, int]:
+        """Количество заказов по статусам (за день или за все время)"""
+        query = select(
+            order_status_counters.c.status,
+            func.sum(order_status_counters.c.count)
+        ).group_by(order_status_counters.c.status)
+        if day is not None:
+            query = query.where(order_status_counters.c.day == day)
+        result = await self.session.execute(query)
+        return {status: int(count) for status, count in result.all()}
+
+    # ==================== Поиск ====================
+    async def search_by_number(self, prefix: str, limit: int = 10) -> List[Row]:
+        """Заказы по началу номера (индекс text_pattern_ops)"""
+        result = await self.session.execute(
+            self._list_query()
+            .where(Order.number.like(f"{escape_like(prefix)}%", escape="\\"))
+            .order_by(Order.number.desc())
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def search_by_phone(self, digits: str, limit: int = 10) -> List[Row]:
+        """Заказы по цифрам телефона в любом месте номера (триграммный индекс)"""
+        result = await self.session.execute(
+            self._list_query()
+            .where(Order.phone_digits.like(f"%{digits}%"))
+            .order_by(Order.datetime.desc(), Order.id.desc())
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def search_text(self, text: str, limit: int = 10) -> List[Row]:
+        """Заказы по подстроке в имени клиента или адресе (триграммные индексы)"""
+        pattern = f"%{escape_like(text)}%"
+        result = await self.session.execute(
+            self._list_query()
+            .where(or_(
+                Order.client_name.ilike(pattern, escape="\\"),
+                Order.address.ilike(pattern, escape="\\")
+            ))
+            .order_by(Order.datetime.desc(), Order.id.desc())
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def get_list_by_phone(self, phone_e164: str, limit: int = 5) -> List[Row]:
+        """Последние заказы клиента по телефону в формате E.164"""
+        result = await self.session.execute(
+            self._list_query()
+            .where(Order.phone_e164 == phone_e164)
+            .order_by(Order.datetime.desc())
+            .limit(limit)
+        )
+        return list(result.all())
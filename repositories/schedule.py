@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, List, Optional, Set
+from datetime import datetime
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import master_schedule_slots, master_schedule_slots_archive
+
+
+# Слот с этим статусом мастера не блокирует, любой другой - блокирует
+FREE_STATUS = "free"
+
+slots = master_schedule_slots.c
+
+
+def slot_start(dt: datetime) -> datetime:
+    """Время слота с точностью до минуты (как в старом графике "HH:MM")"""
+    return dt.replace(second=0, microsecond=0)
+
+
+class ScheduleRepository:
+    """Repository для графика мастеров (master_schedule_slots)"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def set_slot(self, master_id: int, starts_at: datetime, status: str):
+        """Записать статус слота (одна строка, upsert)"""
+        stmt = insert(master_schedule_slots).values(
+            master_id=master_id, starts_at=slot_start(starts_at), status=status
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[slots.master_id, slots.starts_at],
+            set_={"status": stmt.excluded.status}
+        )
+        await self.session.execute(stmt)
+    
+    async def get_for_master(
+        self,
+        master_id: int,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[Row]:
+        """Слоты мастера (starts_at, status) по времени"""
+        query = select(slots.starts_at, slots.status).where(slots.master_id == master_id)
+        if date_from is not None:
+            query = query.where(slots.starts_at >= date_from)
+        if date_to is not None:
+            query = query.where(slots.starts_at < date_to)
+        result = await self.session.execute(query.order_by(slots.starts_at))
+        return list(result.all())
+    
+    async def get_blocked(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        master_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Set[datetime]]:
+        """Занятые слоты всех мастеров в [date_from, date_to]: {master_id: {время, ...}}"""
+        query = select(slots.master_id, slots.starts_at).where(
+            slots.starts_at >= slot_start(date_from),
+            slots.starts_at <= date_to,
+            slots.status != FREE_STATUS
+        )
+        if master_ids is not None:
+            query = query.where(slots.master_id.in_(list(master_ids)))
+        result = await self.session.execute(query)
+        blocked: Dict[int, Set[datetime]] = {}
+        for master_id, starts_at in result.all():
+            blocked.setdefault(master_id, set()).add(starts_at)
+        return blocked
+    
+    async def is_free(self, master_id: int, dt: datetime) -> bool:
+        """Свободен ли мастер по графику в это время"""
+        result = await self.session.execute(
+            select(slots.status).where(
+                slots.master_id == master_id,
+                slots.starts_at == slot_start(dt)
+            )
+        )
+        status = result.scalar_one_or_none()
+        return status is None or status == FREE_STATUS
+    
+    async def archive_before(self, cutoff: datetime, limit: int, keep: bool = True) -> int:
+        """
+        Убрать из графика до limit слотов раньше cutoff (одним запросом).
+        keep=True - перенести в master_schedule_slots_archive, иначе удалить.
+        Строки, заблокированные другой транзакцией, пропускаются до следующего раза.
+        """
+        batch = (
+            select(slots.master_id, slots.starts_at)
+            .where(slots.starts_at < cutoff)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        removed = (
+            master_schedule_slots.delete()
+            .where(tuple_(slots.master_id, slots.starts_at).in_(batch))
+            .returning(slots.master_id, slots.starts_at, slots.status)
+        )
+        if not keep:
+            result = await self.session.execute(removed)
+            return len(result.all())
+
+        removed = removed.cte("removed")
+        stmt = insert(master_schedule_slots_archive).from_select(
+            ["master_id", "starts_at", "status"],
+            select(removed.c.master_id, removed.c.starts_at, removed.c.status)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["master_id", "starts_at"],
+            set_={"status": stmt.excluded.status}
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
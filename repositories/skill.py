@@ -1,5 +1,5 @@
-from typing import Optional, List
-from sqlalchemy import select
+from typing import Optional, List, Tuple
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.base import BaseRepository
@@ -12,6 +12,22 @@ class SkillRepository(BaseRepository[Skill]):
     def __init__(self, session: AsyncSession):
         super().__init__(Skill, session)
     
+    async def get_all(self, limit: Optional[int] = None, offset: int = 0) -> List[Skill]:
+        """Все навыки (без ограничения по умолчанию - список навыков небольшой)"""
+        query = select(Skill).order_by(Skill.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+    
+    async def get_fingerprint(self) -> Tuple[int, int]:
+        """(количество, максимальный id) навыков - дешевая проверка, изменился ли список"""
+        result = await self.session.execute(
+            select(func.count(Skill.id), func.coalesce(func.max(Skill.id), 0))
+        )
+        count, max_id = result.one()
+        return count, max_id
+    
     async def get_by_ids(self, skill_ids: List[int]) -> List[Skill]:
         """Получить навыки по списку ID"""
         result = await self.session.execute(
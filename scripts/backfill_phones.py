@@ -0,0 +1,78 @@
+"""
+Заполнение нормализованных телефонов старых заказов:
+orders.phone_digits (миграция 5d2b7f4a9c13) и orders.phone_e164 (миграция a86e0d3f5b27).
+
+Пачками по id, каждая пачка - отдельная транзакция: таблица не блокируется
+надолго, скрипт можно прервать и запустить снова.
+
+Запуск: python scripts/backfill_phones.py [--batch 5000]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import bindparam, or_, select, update
+
+from core.utils import normalize_phone, to_e164
+from database.engine import DatabaseManager
+from models import Order
+
+
+async def backfill(batch_size: int) -> int:
+    session_factory = await DatabaseManager.get_session_factory()
+    orders = Order.__table__
+    last_id = 0
+    updated = 0
+    while True:
+        async with session_factory() as session:
+            rows = (await session.execute(
+                select(Order.id, Order.phone, Order.phone_digits, Order.phone_e164)
+                .where(
+                    Order.id > last_id,
+                    or_(Order.phone_digits.is_(None), Order.phone_e164.is_(None))
+                )
+                .order_by(Order.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                return updated
+
+            last_id = rows[-1].id
+            values = []
+            for row in rows:
+                digits = normalize_phone(row.phone)
+                e164 = to_e164(row.phone)
+                # У невалидных номеров phone_e164 остается пустым - такие строки не трогаем
+                if (digits, e164) != (row.phone_digits, row.phone_e164):
+                    values.append({"order_id": row.id, "digits": digits, "e164": e164})
+            if values:
+                await session.execute(
+                    update(orders)
+                    .where(orders.c.id == bindparam("order_id"))
+                    .values(phone_digits=bindparam("digits"), phone_e164=bindparam("e164")),
+                    values
+                )
+                await session.commit()
+            updated += len(values)
+            print(f"  ... id до {last_id}: обновлено {updated}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Заполнение orders.phone_digits и orders.phone_e164")
+    parser.add_argument("--batch", type=int, default=5000, help="размер пачки")
+    args = parser.parse_args()
+
+    try:
+        print("📞 Заполнение телефонов...")
+        updated = await backfill(args.batch)
+        print(f"✅ Готово: обновлено {updated} заказов")
+    finally:
+        await DatabaseManager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
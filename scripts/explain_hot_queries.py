@@ -0,0 +1,151 @@
+"""
+Планы горячих запросов до и после индексов (миграция 3b9f1e7c2a4d).
+
+Запуск:
+    python scripts/explain_hot_queries.py            # планы с текущими индексами
+    python scripts/explain_hot_queries.py --compare  # без индексов и с ними
+
+В режиме --compare индексы удаляются внутри транзакции, которая затем
+откатывается: данные и схема не меняются, но на время прогона таблицы
+заблокированы - не запускать на рабочей базе под нагрузкой.
+"""
+import argparse
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from database.engine import DatabaseManager
+
+
+HOT_INDEXES = (
+    'ix_orders_status_datetime',
+    'ix_orders_datetime_id',
+    'ix_orders_number_pattern',
+    'ix_assignments_master_order',
+    'ix_master_skills_master_id',
+    'ix_master_skills_skill_id',
+    'ix_order_skills_order_id',
+    'ix_order_skills_skill_id',
+)
+
+# Название -> SQL (повторяет запросы репозиториев)
+HOT_QUERIES = {
+    "Заявки по статусу, 1-я страница": """
+        SELECT id FROM orders WHERE status = 'new'
+        ORDER BY datetime DESC, id DESC LIMIT 6
+    """,
+    "Заявки по статусу, страница по курсору": """
+        SELECT id FROM orders WHERE status = 'new' AND (datetime, id) < (:dt, :order_id)
+        ORDER BY datetime DESC, id DESC LIMIT 6
+    """,
+    "Все заявки, страница по курсору": """
+        SELECT id FROM orders WHERE (datetime, id) < (:dt, :order_id)
+        ORDER BY datetime DESC, id DESC LIMIT 6
+    """,
+    "Заявки за день": """
+        SELECT id FROM orders WHERE datetime >= :day AND datetime < :day + interval '1 day'
+    """,
+    "Последний номер за день": """
+        SELECT max(number) FROM orders WHERE number LIKE :prefix
+    """,
+    "Назначение заказа": """
+        SELECT id FROM assignments WHERE order_id = :order_id
+    """,
+    "Заявки мастера": """
+        SELECT o.id FROM assignments a JOIN orders o ON o.id = a.order_id
+        WHERE a.master_id = :master_id ORDER BY o.datetime DESC
+    """,
+    "Мастера с навыком": """
+        SELECT master_id FROM master_skills WHERE skill_id = :skill_id
+    """,
+    "Навыки заказа": """
+        SELECT skill_id FROM order_skills WHERE order_id = :order_id
+    """,
+    "Мастер по telegram_id": """
+        SELECT id FROM masters WHERE telegram_id = :telegram_id
+    """,
+}
+
+
+async def sample_params(conn) -> dict:
+    """Параметры запросов из середины реальных данных"""
+    order = (await conn.execute(text(
+        "SELECT id, datetime, number FROM orders ORDER BY datetime, id "
+        "OFFSET (SELECT count(*) / 2 FROM orders) LIMIT 1"
+    ))).first()
+    master = (await conn.execute(text("SELECT id, telegram_id FROM masters LIMIT 1"))).first()
+    skill_id = (await conn.execute(text("SELECT min(id) FROM skills"))).scalar()
+
+    if order is None:
+        print("⚠️  В orders нет строк - планы не покажут разницы")
+    return {
+        "order_id": order.id if order else 0,
+        "dt": order.datetime if order else None,
+        "day": order.datetime.replace(hour=0, minute=0, second=0, microsecond=0) if order else None,
+        "prefix": f"{order.number[:10]}-%" if order else "2025-01-01-%",
+        "master_id": master.id if master else 0,
+        "telegram_id": master.telegram_id if master else 0,
+        "skill_id": skill_id or 0,
+    }
+
+
+async def explain_all(conn, params: dict) -> dict:
+    """Название запроса -> (план, время выполнения, мс)"""
+    results = {}
+    for name, sql in HOT_QUERIES.items():
+        used = {key: value for key, value in params.items() if f":{key}" in sql}
+        rows = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), used)
+        plan = [row[0] for row in rows]
+        timing = next((line for line in plan if line.startswith("Execution Time")), "")
+        match = re.search(r"([\d.]+) ms", timing)
+        results[name] = (plan, float(match.group(1)) if match else 0.0)
+    return results
+
+
+def print_plans(title: str, results: dict):
+    print(f"\n{'=' * 20} {title} {'=' * 20}")
+    for name, (plan, _) in results.items():
+        print(f"\n--- {name}")
+        print("\n".join(plan))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", action="store_true", help="сравнить с планами без индексов")
+    args = parser.parse_args()
+
+    engine = await DatabaseManager.get_engine()
+    try:
+        async with engine.connect() as conn:
+            params = await sample_params(conn)
+            after = await explain_all(conn, params)
+            print_plans("С индексами", after)
+
+            if not args.compare:
+                return
+
+            # Все в одной транзакции соединения: откат возвращает индексы
+            try:
+                for name in HOT_INDEXES:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                before = await explain_all(conn, params)
+            finally:
+                await conn.rollback()
+            print_plans("Без индексов", before)
+
+            print(f"\n{'=' * 20} Итог (мс) {'=' * 20}")
+            print(f"{'запрос':45} {'без':>10} {'с индексами':>12}")
+            for name in HOT_QUERIES:
+                print(f"{name:45} {before[name][1]:>10.3f} {after[name][1]:>12.3f}")
+    finally:
+        await DatabaseManager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
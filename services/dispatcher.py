@@ -0,0 +1,328 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from config import (
+    ADMIN_IDS, AUTO_ASSIGN_MODE,
+    DISPATCH_INTERVAL_SECONDS, DISPATCH_RETRY_SECONDS, DISPATCH_RESYNC_SECONDS
+)
+from models import Master, Order, OrderStatus
+from database.engine import get_session
+from core.availability import AvailabilityIndex, availability_index
+from core.dispatch_queue import DispatchQueue, QueuedOrder, dispatch_queue
+from core.locks import try_advisory_xact_lock, MASTER_LOCK
+from services.order_service import OrderService
+from services.master_service import MasterService
+
+logger = logging.getLogger(__name__)
+
+CYCLE_JOB_ID = "dispatch_cycle"
+RESYNC_JOB_ID = "dispatch_resync"
+
+# Статусы заказов, которые диспетчер может назначить
+PENDING_STATUSES = (OrderStatus.new, OrderStatus.rejected)
+
+
+class AssignmentDispatcher:
+    """
+    Фоновое автоназначение мастеров на заказы из очереди dispatch_queue.
+
+    Цикл обрабатывает только заказы из очереди (один запрос по их id),
+    таблица заказов целиком не сканируется. Плановые циклы идут раз в
+    DISPATCH_INTERVAL_SECONDS, постановка в очередь запускает цикл досрочно.
+
+    Можно запускать несколько процессов бота: заказы цикла берутся через
+    FOR UPDATE SKIP LOCKED, мастера - через advisory-лок без ожидания,
+    а уникальный order_id в assignments исключает двойное назначение.
+    """
+
+    def __init__(self, queue: DispatchQueue = dispatch_queue, history_size: int = 500):
+        self.queue = queue
+        self.bot: Optional[Bot] = None
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._running = False
+        self._rerun = False
+
+        # Метрики
+        self._wait_seconds = deque(maxlen=history_size)
+        self.assigned_total = 0
+        self.cycles_total = 0
+        self.last_cycle_at: Optional[datetime] = None
+        self.last_cycle_ms = 0.0
+
+    # ==================== Запуск ====================
+    def start(self, bot: Bot, scheduler: AsyncIOScheduler):
+        """Зарегистрировать задачи в планировщике и подписаться на очередь"""
+        self.bot = bot
+        self.scheduler = scheduler
+        now = datetime.now(scheduler.timezone)
+
+        scheduler.add_job(
+            self.run_cycle, "interval",
+            seconds=DISPATCH_INTERVAL_SECONDS,
+            id=CYCLE_JOB_ID,
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        # Сверка с БД сразу при старте: очередь в памяти после перезапуска пуста
+        scheduler.add_job(
+            self.resync, "interval",
+            seconds=DISPATCH_RESYNC_SECONDS,
+            id=RESYNC_JOB_ID,
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+            next_run_time=now
+        )
+        self.queue.set_wakeup(self.wakeup)
+
+    def wakeup(self, delay_seconds: float = 0):
+        """Запустить цикл не позже чем через delay_seconds"""
+        if self.scheduler is None:
+            return
+        if self._running and delay_seconds <= 0:
+            # Цикл уже идет - повторим его сразу после завершения
+            self._rerun = True
+            return
+
+        job = self.scheduler.get_job(CYCLE_JOB_ID)
+        if job is None:
+            return
+        run_at = datetime.now(self.scheduler.timezone) + timedelta(seconds=delay_seconds)
+        if job.next_run_time is None or job.next_run_time > run_at:
+            job.modify(next_run_time=run_at)
+
+    # ==================== Циклы ====================
+    async def resync(self):
+        """Поставить в очередь все будущие заказы без мастера (новые и после отказа)"""
+        try:
+            async with get_session() as session:
+                orders = await OrderService(session).get_unassigned_orders(
+                    statuses=PENDING_STATUSES,
+                    from_datetime=datetime.now()
+                )
+            added = 0
+            for order in orders:
+                if order.id not in self.queue and order.required_skills:
+                    self.queue.push(order.id, enqueued_at=order.created_at)
+                    added += 1
+            if added:
+                logger.info(f"Dispatcher resync queued {added} orders")
+        except Exception as e:
+            logger.error(f"Error in dispatcher resync: {e}")
+
+    async def run_cycle(self):
+        """Один цикл распределения: заказы из очереди, которые уже можно назначать"""
+        if self._running:
+            self._rerun = True
+            return
+
+        self._running = True
+        try:
+            while True:
+                self._rerun = False
+                await self._cycle()
+                if not self._rerun:
+                    break
+        except Exception as e:
+            logger.error(f"Error in dispatcher cycle: {e}")
+        finally:
+            self._running = False
+
+    async def _cycle(self):
+        due = self.queue.due()
+        if not due:
+            return
+
+        started = time.monotonic()
+        entries: Dict[int, QueuedOrder] = {e.order_id: e for e in due}
+        assigned: List[Tuple[Order, Master]] = []
+
+        async with get_session() as session:
+            order_service = OrderService(session)
+            master_service = MasterService(session)
+
+            # Заказы блокируются до конца цикла; взятые другим процессом пропускаются
+            orders = await order_service.claim_unassigned_orders(
+                order_ids=list(entries),
+                statuses=PENDING_STATUSES,
+                from_datetime=datetime.now()
+            )
+            claimed_ids = {o.id for o in orders}
+            await self._drop_stale(order_service, entries.keys() - claimed_ids)
+
+            # Без навыков автоназначение невозможно - только вручную
+            pending = [o for o in orders if o.required_skills]
+            for order in orders:
+                if not order.required_skills:
+                    self.queue.discard(order.id)
+            if not pending:
+                return
+
+            await availability_index.refresh(session)
+            excluded = {
+                o.id: entries[o.id].excluded_master_ids
+                for o in pending if entries[o.id].excluded_master_ids
+            }
+
+            if AUTO_ASSIGN_MODE == "batch":
+                plan = await master_service.plan_batch_assignment(pending, excluded=excluded)
+                for order, master in plan:
+                    if await self._assign(order_service, order, master):
+                        assigned.append((order, master))
+            else:
+                # Назначения цикла попадают в общий индекс только после commit,
+                # до этого занятость мастеров в цикле учитывается отдельно
+                planned = AvailabilityIndex()
+                for order in pending:
+                    master = await self._pick_master(
+                        master_service, order, excluded.get(order.id, set()), planned
+                    )
+                    if master and await self._assign(order_service, order, master):
+                        assigned.append((order, master))
+                        planned.add(order.id, master.id, order.datetime)
+
+            # Запасные мастера на случай отказа (при замене свободность перепроверяется)
+            await master_service.store_fallbacks(assigned)
+        # Выход из get_session - один commit на все назначения цикла.
+        # Индекс обновляется только после него: при ошибке commit в нем не
+        # останется занятости, которой нет в БД
+        for order, master in assigned:
+            availability_index.add(order.id, master.id, order.datetime)
+
+        for order, master in assigned:
+            self.queue.discard(order.id)
+            self.assigned_total += 1
+            self._wait_seconds.append(
+                (datetime.utcnow() - entries[order.id].enqueued_at).total_seconds()
+            )
+            await self.notify(order, master)
+
+        # Не нашлось свободного мастера - повторим позже
+        assigned_ids = {order.id for order, _ in assigned}
+        for order in pending:
+            if order.id not in assigned_ids:
+                self.queue.push(order.id, delay_seconds=DISPATCH_RETRY_SECONDS)
+
+        self.cycles_total += 1
+        self.last_cycle_at = datetime.now()
+        self.last_cycle_ms = (time.monotonic() - started) * 1000
+        logger.info(
+            f"Dispatcher assigned {len(assigned)} of {len(pending)} orders "
+            f"in {self.last_cycle_ms:.0f} ms, queue depth {len(self.queue)}"
+        )
+
+    async def _drop_stale(self, order_service: OrderService, order_ids: Set[int]):
+        """
+        Незаблокированные заказы: если заказ все еще ждет мастера, его держит
+        другой процесс - повторим позже; иначе (назначен, удален, прошел) - из очереди.
+        """
+        if not order_ids:
+            return
+        still_pending = await order_service.get_unassigned_orders(
+            order_ids=list(order_ids),
+            statuses=PENDING_STATUSES,
+            from_datetime=datetime.now()
+        )
+        pending_ids = {o.id for o in still_pending}
+        for order_id in order_ids:
+            if order_id in pending_ids:
+                self.queue.push(order_id, delay_seconds=DISPATCH_INTERVAL_SECONDS)
+            else:
+                self.queue.discard(order_id)
+
+    async def _pick_master(
+        self,
+        master_service: MasterService,
+        order: Order,
+        excluded_master_ids: Set[int],
+        planned: AvailabilityIndex
+    ) -> Optional[Master]:
+        """
+        Жадный режим: наименее загруженный подходящий мастер,
+        свободный и с учетом назначений текущего цикла (planned)
+        """
+        suitable = await master_service.find_suitable_masters(
+            order.datetime, [s.id for s in order.required_skills]
+        )
+        for item in suitable:
+            master = item["master"]
+            if master.id not in excluded_master_ids and planned.is_free(master.id, order.datetime):
+                return master
+        return None
+
+    async def _assign(self, order_service: OrderService, order: Order, master: Master) -> bool:
+        """
+        Назначить мастера в транзакции цикла. Мастер блокируется без ожидания:
+        если его сейчас назначает другой процесс, пара пропускается до следующего цикла.
+        Занятость перепроверяется по БД - индекс мог устареть из-за других процессов;
+        пересечение, проскочившее проверку, отклонит exclusion constraint.
+        """
+        if not await try_advisory_xact_lock(order_service.session, MASTER_LOCK, master.id):
+            return False
+        if await order_service.assignment_repo.has_conflict(master.id, order.datetime):
+            return False
+
+        try:
+            await order_service.assign_claimed_order(order, master.id)
+        except ValueError:
+            return False
+        return True
+
+    # ==================== Уведомления ====================
+    async def notify(self, order: Order, master: Master):
+        """Уведомить мастера и админов об автоматическом назначении"""
+        from core.keyboards import order_status_kb
+        try:
+            await self.bot.send_message(
+                master.telegram_id,
+                f"🆕 Новая заявка #{order.number}!\n\n"
+                f"👤 Клиент: {order.client_name}\n"
+                f"📞 Телефон: {order.phone}\n"
+                f"📍 Адрес: {order.address}\n"
+                f"📅 Время: {order.datetime.strftime('%d.%m.%Y %H:%M')}\n"
+                f"🔧 Техника: {order.type} {order.brand} {order.model}\n"
+                f"💬 Проблема: {order.comment}",
+                reply_markup=order_status_kb(order.id, order.status)
+            )
+        except Exception as e:
+            logger.error(f"Failed to notify master {master.id}: {e}")
+
+        # Adminlarga xabar
+        for admin_id in ADMIN_IDS:
+            try:
+                await self.bot.send_message(
+                    admin_id,
+                    f"🤖 Автоматически назначена заявка #{order.number} мастеру {master.name}!"
+                )
+            except Exception:
+                pass
+
+    # ==================== Метрики ====================
+    def stats(self) -> Dict:
+        """Глубина очереди и время до назначения"""
+        waits: List[float] = list(self._wait_seconds)
+        due = self.queue.due()
+        oldest = min((e.enqueued_at for e in due), default=None)
+        return {
+            "queue_depth": len(self.queue),
+            "due": len(due),
+            "oldest_wait_seconds": (
+                (datetime.utcnow() - oldest).total_seconds() if oldest else 0
+            ),
+            "assigned_total": self.assigned_total,
+            "avg_wait_seconds": sum(waits) / len(waits) if waits else 0,
+            "max_wait_seconds": max(waits) if waits else 0,
+            "cycles_total": self.cycles_total,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_ms": self.last_cycle_ms
+        }
+
+
+dispatcher = AssignmentDispatcher()
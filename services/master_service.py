@@ -1,13 +1,34 @@
-from typing import Optional, List, Dict
-from datetime import datetime, date
+from typing import Optional, List, Dict, Tuple, Set
+from datetime import datetime, date, timedelta
+import numpy as np
 from sqlalchemy import insert, delete, select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import (
+    FREE_SLOT_SUGGESTIONS, FREE_SLOT_STEP_MINUTES, WORK_DAY_START_HOUR, WORK_DAY_END_HOUR
+)
 from models import Master, OrderStatus, Skill, Order, master_skills
 from repositories.master import MasterRepository
 from repositories.assignment import AssignmentRepository
 from repositories.order import OrderRepository
 from repositories.skill import SkillRepository
+from repositories.schedule import ScheduleRepository
+from core.availability import availability_index
+from core.availability_matrix import AvailabilityMatrix
+from core.matching import min_cost_assignment, INFEASIBLE
+from core.scoring import rank_candidates
+from core.fallback import fallback_candidates
+from core.free_slots import next_free_slots
+from core.skill_catalog import skill_catalog
+from core.role_cache import role_cache
+from core.pagination import Cursor
+
+
+# Веса стоимости в пакетном распределении: один заказ загрузки
+# против полного несовпадения навыков
+LOAD_COST = 1.0
+MISSING_SKILLS_COST = 10.0
 
 
 class MasterService:
@@ -19,6 +40,7 @@ class MasterService:
         self.assignment_repo = AssignmentRepository(session)
         self.skill_repo = SkillRepository(session)
         self.order_repo = OrderRepository(session)
+        self.schedule_repo = ScheduleRepository(session)
     
     async def get_masters_for_assignment(
         self,
@@ -33,51 +55,27 @@ class MasterService:
         - buffer_hours: буфер времени (по умолчанию 4 часа).
         Возвращает список словарей с данными мастеров.
         """
-        # Получаем всех мастеров с навыками
+        # Фиксированное число запросов независимо от количества мастеров:
+        # мастера с навыками; занятость - из индекса, навыки - из каталога в памяти
         masters = await self.master_repo.get_all_with_skills()
-        result = []
-
+        skill_ids = list(skill_ids or [])
         for master in masters:
-            # Проверяем доступность с буфером
-            is_available = await self.master_repo.check_availability_with_buffer(
-                master.id, order_datetime, buffer_hours
-            )
-            
-            # Количество заказов на сегодня (исключая new и rejected)
-            today_count = await self.assignment_repo.count_today_assignments(master.id)
-            
-            # Навыки мастера
-            master_skill_ids = [s.id for s in master.skills] if master.skills else []
-            skills_text = ", ".join([s.name for s in master.skills]) if master.skills else "Нет навыков"
-            
-            # Совпадение навыков (если skill_ids указаны)
-            matching_skills = []
-            missing_skills = []
-            if skill_ids:
-                matching_skills = [s for s in master.skills if s.id in skill_ids]
-                missing_skills = [s for s in (await self.skill_repo.get_by_ids(skill_ids)) if s.id not in master_skill_ids]
-            
-            result.append({
-                "master": master,
-                "today_orders": today_count,
-                "skills": skills_text,
-                "is_available": is_available,
-                "matching_skills": [s.name for s in matching_skills] if skill_ids else [],
-                "missing_skills": [s.name for s in missing_skills] if skill_ids else [],
-                "skills_match_percent": (
-                    len(matching_skills) / len(skill_ids) * 100 if skill_ids else 100
-                )
-            })
-        
-        # Сортировка: сначала по совпадению навыков (если есть), затем по количеству заказов
-        result.sort(
-            key=lambda x: (
-                -x["skills_match_percent"] if skill_ids else 0,  # Сначала по совпадению навыков (убывание)
-                x["today_orders"]  # Затем по количеству заказов (возрастание)
-            )
+            skill_catalog.register(master.skills)
+        # Названия навыков, которых нет ни у одного мастера, - отдельным запросом
+        unnamed = skill_catalog.unnamed(skill_ids)
+        if unnamed:
+            skill_catalog.register(await self.skill_repo.get_by_ids(unnamed))
+        await availability_index.ensure_fresh(self.session)
+        blocked = await self.schedule_repo.get_blocked(order_datetime, order_datetime)
+        
+        return rank_candidates(
+            masters,
+            availability_index,
+            order_datetime,
+            skill_ids,
+            buffer_hours,
+            blocked=blocked
         )
-        
-        return result
     
     async def find_suitable_masters(
         self,
@@ -92,83 +90,246 @@ class MasterService:
         if not skill_ids:
             return []
         
-        # Керакли навиклари бўлган мастерларни оламиз
-        masters = await self.master_repo.get_by_skills(skill_ids)
+        batch = await self.find_suitable_masters_batch([(order_datetime, skill_ids)], buffer_hours)
+        return batch[0]
+    
+    async def find_suitable_masters_batch(
+        self,
+        orders: List[Tuple[datetime, List[int]]],
+        buffer_hours: int = 4
+    ) -> List[List[Dict]]:
+        """
+        Подбор мастеров сразу для пакета заказов [(время, навыки), ...].
+        Мастера загружаются один раз, проверка времени и навыков - векторно
+        по матрице занятости. Для каждого заказа - список как у find_suitable_masters.
+        """
+        if not orders:
+            return []
         
-        suitable = []
+        masters = await self.master_repo.get_all_with_skills()
+        await availability_index.ensure_fresh(self.session)
+        if not masters:
+            return [[] for _ in orders]
+        
+        order_times = [dt for dt, _ in orders]
+        blocked = await self.schedule_repo.get_blocked(min(order_times), max(order_times))
+        matrix = AvailabilityMatrix.for_orders(
+            masters, availability_index, order_times, buffer_hours, blocked=blocked
+        )
+        suitable = matrix.suitable(order_times, [skill_ids for _, skill_ids in orders], buffer_hours)
         
-        for master in masters:
-            # Получаем все активные и новые назначения мастера на день
-            assignments = await self.assignment_repo.get_active_for_master(master.id)
-            is_time_conflict = False
-            
-            # Проверяем конфликт по времени с учетом буфера
-            for assignment in assignments:
-                existing_time = assignment.order.datetime
-                time_diff = abs((order_datetime - existing_time).total_seconds() / 3600)
-                if time_diff < buffer_hours:
-                    is_time_conflict = True
-                    break
-            
-            if is_time_conflict:
-                continue
+        today = [availability_index.today_count(m.id) for m in masters]
+        result = []
+        for row in suitable:
+            # Сортировка: у кого меньше заказов сегодня, затем всего активных
+            rows = sorted(np.flatnonzero(row), key=lambda i: (today[i], matrix.load[i]))
+            result.append([
+                {
+                    "master": masters[i],
+                    "today_orders": today[i],
+                    "skills": ", ".join([s.name for s in masters[i].skills]) if masters[i].skills else "Нет навыков"
+                }
+                for i in rows
+            ])
+        return result
+    
+    async def find_free_slots(
+        self,
+        skill_ids: List[int],
+        date_from: datetime,
+        date_to: datetime,
+        limit: int = FREE_SLOT_SUGGESTIONS,
+        buffer_hours: int = 4,
+        distinct_times: bool = True
+    ) -> List[Dict]:
+        """
+        Ближайшие времена в [date_from, date_to], когда свободен хотя бы один
+        мастер с нужными навыками: [{"datetime": время, "master": Master}, ...].
+        Считается по индексу занятости в памяти (проход по промежуткам между
+        заказами), а не перебором времени через find_suitable_masters.
+        """
+        if not skill_ids:
+            return []
+        
+        masters = await self.master_repo.get_all_with_skills()
+        required = skill_catalog.mask(skill_ids)
+        candidates = {m.id: m for m in masters if m.skill_mask & required}
+        if not candidates:
+            return []
+        
+        await availability_index.ensure_fresh(self.session)
+        blocked = await self.schedule_repo.get_blocked(date_from, date_to, candidates.keys())
+        slots = next_free_slots(
+            availability_index,
+            candidates.keys(),
+            date_from,
+            date_to,
+            limit,
+            buffer_hours=buffer_hours,
+            step_minutes=FREE_SLOT_STEP_MINUTES,
+            day_start_hour=WORK_DAY_START_HOUR,
+            day_end_hour=WORK_DAY_END_HOUR,
+            blocked=blocked,
+            distinct_times=distinct_times
+        )
+        return [{"datetime": dt, "master": candidates[master_id]} for dt, master_id in slots]
+    
+    async def plan_batch_assignment(
+        self,
+        orders: List[Order],
+        buffer_hours: int = 4,
+        excluded: Optional[Dict[int, Set[int]]] = None
+    ) -> List[Tuple[Order, Master]]:
+        """
+        Глобальное распределение пакета заказов (заказы с загруженными required_skills).
+
+        Вместо жадного назначения по одному заказу решается задача о назначениях
+        минимальной стоимости: стоимость = загрузка мастера + штраф за недостающие
+        навыки, недопустимые пары (занят по буферу, нет ни одного навыка) исключены.
+        За раунд мастер получает не больше одного заказа; выбранные пары добавляются
+        в копию индекса занятости, и следующий раунд учитывает их буфер.
+        excluded: {order_id: {master_id, ...}} - мастера, которым заказ не назначать
+        """
+        orders = [o for o in orders if o.required_skills]
+        if not orders:
+            return []
+        
+        masters = await self.master_repo.get_all_with_skills()
+        await availability_index.ensure_fresh(self.session)
+        if not masters:
+            return []
+        
+        planning_index = availability_index.snapshot()
+        blocked = await self.schedule_repo.get_blocked(
+            min(o.datetime for o in orders), max(o.datetime for o in orders)
+        )
+        plan = []
+        remaining = orders
+        
+        while remaining:
+            order_times = [o.datetime for o in remaining]
+            skill_sets = [[s.id for s in o.required_skills] for o in remaining]
             
-            # Проверяем доступность с буфером (дополнительно для графика)
-            is_available = await self.master_repo.check_availability_with_buffer(
-                master.id, 
-                order_datetime, 
-                buffer_hours
+            matrix = AvailabilityMatrix.for_orders(
+                masters, planning_index, order_times, buffer_hours, blocked=blocked
             )
+            suitable = matrix.suitable(order_times, skill_sets, buffer_hours)
+            if excluded:
+                for n, order in enumerate(remaining):
+                    master_ids = excluded.get(order.id)
+                    if master_ids:
+                        suitable[n] &= ~np.isin(matrix.master_ids, list(master_ids))
+            matches = matrix.skill_matches(skill_sets)
+            required = np.array([len(ids) for ids in skill_sets], dtype=np.float64)[:, None]
             
-            if not is_available:
-                continue
-            
-            # Бугунги заказлар сони
-            today_count = await self.assignment_repo.count_today_assignments(master.id)
+            cost = (
+                matrix.load[None, :] * LOAD_COST
+                + (1 - matches / required) * MISSING_SKILLS_COST
+            )
+            cost = np.where(suitable, cost, INFEASIBLE)
             
-            # Навиклар рўйхати
-            skills_text = ", ".join([s.name for s in master.skills]) if master.skills else "Нет навыков"
+            pairs = min_cost_assignment(cost.tolist())
+            if not pairs:
+                break
             
-            suitable.append({
-                "master": master,
-                "today_orders": today_count,
-                "skills": skills_text
-            })
-        
-        # Сортировка: у кого меньше заказов сегодня
-        suitable.sort(key=lambda x: x["today_orders"])
-        
-        return suitable
+            assigned = set()
+            for n, row in pairs:
+                order, master = remaining[n], masters[row]
+                planning_index.add(order.id, master.id, order.datetime)
+                plan.append((order, master))
+                assigned.add(n)
+            remaining = [o for n, o in enumerate(remaining) if n not in assigned]
+        
+        return plan
     
     async def auto_assign_best_master(
         self,
         order_datetime: datetime,
-        skill_ids: List[int]
+        skill_ids: List[int],
+        order_id: Optional[int] = None
     ) -> Optional[Master]:
         """
         Автоматик энг яхши мастерни топиш
         (бугун энг кам заказ олган)
+        order_id - остальные подходящие мастера запоминаются как запасные
         """
         suitable = await self.find_suitable_masters(order_datetime, skill_ids)
         
         if not suitable:
             return None
         
+        if order_id is not None:
+            fallback_candidates.store(order_id, [s["master"].id for s in suitable[1:]])
+        
         # Энг кам заказли мастерни қайтарамиз
         return suitable[0]["master"]
     
+    async def store_fallbacks(self, assigned: List[Tuple[Order, Master]], buffer_hours: int = 4):
+        """
+        Запасные мастера для только что назначенных заказов
+        (один пакетный подбор на все заказы)
+        """
+        if not assigned:
+            return
+        
+        batch = await self.find_suitable_masters_batch(
+            [(order.datetime, [s.id for s in order.required_skills]) for order, _ in assigned],
+            buffer_hours
+        )
+        for (order, master), suitable in zip(assigned, batch):
+            fallback_candidates.store(
+                order.id,
+                [s["master"].id for s in suitable if s["master"].id != master.id]
+            )
+    
+    async def take_fallback_master(
+        self,
+        order: Order,
+        exclude_master_id: int,
+        buffer_hours: int = 4
+    ) -> Optional[Master]:
+        """
+        Замена при отказе мастера: первый свободный мастер из запасного списка,
+        если список пуст - полный подбор (find_available_master)
+        """
+        while True:
+            master_id = fallback_candidates.take(
+                order.id, order.datetime, availability_index, (exclude_master_id,), buffer_hours
+            )
+            if master_id is None:
+                break
+            if not await self.schedule_repo.is_free(master_id, order.datetime):
+                continue
+            master = await self.master_repo.get(master_id)
+            if master:
+                return master
+        
+        skill_ids = [s.id for s in order.required_skills] if order.required_skills else []
+        return await self.find_available_master(order.datetime, skill_ids, exclude_master_id)
+    
+    async def get_load_counters(self) -> Dict[int, Dict[str, int]]:
+        """
+        Загрузка мастеров {master_id: {"today": n, "active": m}}.
+        Из индекса занятости, пока он свежий (обновляется при назначениях и сменах
+        статуса); иначе - одним GROUP BY в БД, без загрузки всех активных назначений
+        """
+        if availability_index.is_stale():
+            return await self.assignment_repo.get_load_counters()
+        return availability_index.load_counters()
+    
     async def get_all_masters_with_today_count(self) -> List[Dict]:
         """
         ЯНГИ: Барча мастерларни бугунги заказлар сони билан олиш
         (навиқ ва вақт текшириш йўқ - фақат кўрсатиш учун)
         """
         masters = await self.master_repo.get_all_with_skills()
+        counters = await self.get_load_counters()
         
         result = []
         
         for master in masters:
-            # Бугунги заказлар сони
-            today_count = await self.assignment_repo.count_today_assignments(master.id)
+            # Бугунги заказлар сони (из счетчиков, без запроса на каждого мастера)
+            today_count = counters.get(master.id, {}).get("today", 0)
             
             # Навиқлар
             skills_text = ", ".join([s.name for s in master.skills]) if master.skills else "Нет навыков"
@@ -235,6 +396,8 @@ class MasterService:
             skills = result.scalars().all()
         
         await self.session.commit()
+        # Пользователь мог быть в кэше как незарегистрированный
+        role_cache.invalidate(telegram_id)
         
         return {
             "id": master.id,
@@ -256,6 +419,7 @@ class MasterService:
         if not master:
             raise ValueError("Мастер не найден")
         
+        old_telegram_id = master.telegram_id
         if name is not None:
             master.name = name
         if phone is not None:
@@ -266,6 +430,7 @@ class MasterService:
         await self.session.flush()
         await self.session.commit()
         await self.session.refresh(master)
+        role_cache.invalidate(old_telegram_id, master.telegram_id)
         return master
     
     async def delete_master(self, master_id: int) -> bool:
@@ -281,8 +446,11 @@ class MasterService:
         stmt_delete_skills = delete(master_skills).where(master_skills.c.master_id == master_id)
         await self.session.execute(stmt_delete_skills)
         
+        telegram_id = master.telegram_id
         await self.session.delete(master)
         await self.session.commit()
+        availability_index.drop_master(master_id)
+        role_cache.invalidate(telegram_id)
         return True
     
     async def update_skills(self, master_id: int, skill_ids: List[int]):
@@ -296,79 +464,74 @@ class MasterService:
         
         await self.session.commit()
     
-    async def get_master_orders(self, master_id: int) -> List[Order]:
-        """Получить все заказы мастера"""
-        assignments = await self.assignment_repo.get_by_master(master_id)
-        order_ids = [a.order_id for a in assignments]
-        if not order_ids:
-            return []
-        
-        orders = await self.order_repo.get_by_ids(order_ids)
-        return sorted(orders, key=lambda x: x.datetime, reverse=True)
+    async def get_master_orders(
+        self,
+        master_id: int,
+        statuses: Optional[Tuple[OrderStatus, ...]] = None,
+        cursor: Optional[Cursor] = None,
+        backward: bool = False,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Row], bool]:
+        """Заказы мастера (новые сверху): (строки, есть ли еще в этом направлении)"""
+        return await self.order_repo.get_for_master(
+            master_id, statuses=statuses, cursor=cursor, backward=backward, limit=limit
+        )
+    
+    async def count_master_orders(
+        self,
+        master_id: int,
+        statuses: Optional[Tuple[OrderStatus, ...]] = None
+    ) -> int:
+        """Количество заказов мастера по статусам"""
+        return await self.order_repo.count_for_master(master_id, statuses)
+    
+    async def get_master_profit(
+        self,
+        master_id: int,
+        statuses: Optional[Tuple[OrderStatus, ...]] = (OrderStatus.completed,)
+    ) -> float:
+        """Общая прибыль мастера по заказам со статусами (по умолчанию завершенные)"""
+        return await self.order_repo.sum_profit_for_master(master_id, statuses)
     
     async def get_all_with_skills(self):
         """Получить всех мастеров с навыками"""
         return await self.master_repo.get_all_with_skills()
     
-    async def update_schedule(self, master_id: int, dt: datetime, status: str):
-        """Обновить график мастера"""
+    async def update_schedule(self, master_id: int, dt: datetime, status: str, commit: bool = True):
+        """Обновить график мастера (commit=False - в составе транзакции вызывающего)"""
         master = await self.master_repo.get(master_id)
         if not master:
             raise ValueError("Мастер не найден")
         
-        date_str = dt.strftime("%Y-%m-%d")
-        time_str = dt.strftime("%H:%M")
-        
-        # Графикни yangilash
-        schedule = master.schedule or {}
-        
-        # schedule ni lug'at ekanligini tekshirish
-        if not isinstance(schedule, dict):
-            schedule = {}
-        
-        # date_str uchun lug'atni tayyorlash
-        if date_str not in schedule:
-            schedule[date_str] = {}
-        
-        # time_str uchun statusni yangilash
-        schedule[date_str][time_str] = status
-        master.schedule = schedule
-        
+        # Одна строка слота вместо перезаписи всего графика
+        await self.schedule_repo.set_slot(master_id, dt, status)
         await self.session.flush()
-        await self.session.commit()
+        if commit:
+            await self.session.commit()
 
-    async def get_current_orders(self, master_id: int) -> List[Order]:
-        """Получить текущие активные заказы мастера (new, confirmed, in_progress, arrived)"""
-        assignments = await self.assignment_repo.get_by_master(master_id)
-        order_ids = [a.order_id for a in assignments]
-        if not order_ids:
-            return []
-        
-        orders = await self.order_repo.get_by_ids(order_ids)
-        active_orders = [
-            o for o in orders 
-            if o.status in [OrderStatus.in_progress, OrderStatus.arrived]
-        ]
-        return sorted(active_orders, key=lambda x: x.datetime, reverse=True)
-    
+    async def get_schedule(self, master_id: int, date_from: date, days: int = 7) -> Dict[str, Dict[str, str]]:
+        """График мастера на days дней: {"YYYY-MM-DD": {"HH:MM": статус}}"""
+        start = datetime.combine(date_from, datetime.min.time())
+        rows = await self.schedule_repo.get_for_master(master_id, start, start + timedelta(days=days))
+        schedule: Dict[str, Dict[str, str]] = {}
+        for starts_at, status in rows:
+            schedule.setdefault(starts_at.strftime("%Y-%m-%d"), {})[starts_at.strftime("%H:%M")] = status
+        return schedule
 
-    async def get_today_orders(self, master_id: int) -> List[Order]:
-        """Получить заказы мастера на сегодня"""
-        today = date.today()
-        assignments = await self.assignment_repo.get_by_master(master_id)
-        order_ids = [a.order_id for a in assignments]
-        if not order_ids:
-            return []
-        
-        orders = await self.order_repo.get_by_date_range(
+    async def get_current_orders(self, master_id: int) -> List[Row]:
+        """Получить текущие работы мастера (in_progress, arrived), новые сверху"""
+        orders, _ = await self.order_repo.get_for_master(
+            master_id, statuses=(OrderStatus.in_progress, OrderStatus.arrived)
+        )
+        return orders
+    
+    async def get_today_orders(self, master_id: int) -> List[Row]:
+        """Получить заказы мастера на сегодня (по времени)"""
+        today = datetime.combine(date.today(), datetime.min.time())
+        orders, _ = await self.order_repo.get_for_master(
+            master_id,
+            statuses=(OrderStatus.confirmed, OrderStatus.in_progress, OrderStatus.arrived),
             date_from=today,
-            date_to=today,
-            status=None  # Все статусы, но мы отфильтруем ниже
+            date_to=today + timedelta(days=1)
         )
-        active_orders = [
-            o for o in orders 
-            if o.id in order_ids and o.status in [
-                OrderStatus.confirmed, OrderStatus.in_progress, OrderStatus.arrived
-            ]
-        ]
-        return sorted(active_orders, key=lambda x: x.datetime)
\ No newline at end of file
+        return orders[::-1]
@@ -1,11 +1,20 @@
+import re
 from typing import Optional, List, Tuple
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Order, OrderStatus, order_skills
+from models import Order, OrderStatus, order_skills, ACTIVE_ORDER_STATUSES
 from repositories.order import OrderRepository
 from repositories.assignment import AssignmentRepository
+from core.availability import availability_index
+from core.dispatch_queue import dispatch_queue
+from core.fallback import fallback_candidates
+from core.locks import advisory_xact_lock, MASTER_LOCK
+from core.pagination import Cursor
+from core.utils import normalize_phone, to_e164
+from config import SEARCH_RESULTS_LIMIT
 
 
 class OrderService:
@@ -29,16 +38,18 @@ class OrderService:
         skill_ids: List[int] = None
     ) -> Order:
         """Создать новый заказ"""
-        # Генерируем номер заказа на основе максимального существующего
-        max_seq = await self.order_repo.get_max_number_for_date(datetime_obj.date())
+        # Номер заказа из счетчика за день (атомарно, без сканирования номеров)
+        seq = await self.order_repo.next_number_seq(datetime_obj.date())
         date_str = datetime_obj.strftime('%Y-%m-%d')
-        number = f"{date_str}-{max_seq + 1:03d}"
+        number = f"{date_str}-{seq:03d}"
         
         # Создаем заказ
         order = await self.order_repo.create(
             number=number,
             client_name=client_name,
             phone=phone,
+            phone_digits=normalize_phone(phone),
+            phone_e164=to_e164(phone),
             address=address,
             datetime=datetime_obj,
             type=type,
@@ -48,6 +59,7 @@ class OrderService:
             status=OrderStatus.new
         )
         await self.session.flush()
+        await self._count_status(datetime_obj, None, OrderStatus.new)
         
         # Добавляем навыки
         if skill_ids:
@@ -69,6 +81,13 @@ class OrderService:
         if not master:
             raise ValueError(f"Мастер с ID {master_id} не найден")
 
+        # Блокируем заказ, затем мастера (тот же порядок, что у диспетчера),
+        # чтобы параллельные процессы не назначили заказ дважды
+        order = await self.order_repo.get_for_update(order_id)
+        if not order:
+            raise ValueError(f"Заказ с ID {order_id} не найден")
+        await advisory_xact_lock(self.session, MASTER_LOCK, master_id)
+
         # Проверяем, есть ли уже назначение
         existing = await self.assignment_repo.get_by_order(order_id)
         if existing:
@@ -79,28 +98,115 @@ class OrderService:
                 # Удаляем старое назначение, если мастер другой
                 await self.assignment_repo.delete(existing.id)
         
-        # Создаем новое назначение
-        await self.assignment_repo.create(
-            order_id=order_id,
-            master_id=master_id
-        )
+        # Создаем новое назначение (БД проверит буфер по интервалу занятости)
+        try:
+            await self.assignment_repo.create_for_order(order, master_id)
+        except ValueError:
+            await self.session.rollback()
+            raise
         
         # Коммитим изменения (статус остается OrderStatus.new)
         await self.session.commit()
         
         # Возвращаем заказ для уведомлений
         order = await self.order_repo.get(order_id)
+        dispatch_queue.discard(order_id)
+        if order.status in ACTIVE_ORDER_STATUSES:
+            availability_index.add(order_id, master_id, order.datetime)
+        else:
+            availability_index.remove(order_id)
         return order
     
-    async def get_orders_by_master(self, master_id: int) -> List[Order]:
-        """Получить все заказы мастера"""
-        assignments = await self.assignment_repo.get_by_master(master_id)
-        order_ids = [a.order_id for a in assignments]
-        if not order_ids:
-            return []
+    async def assign_claimed_order(self, order: Order, master_id: int) -> Order:
+        """
+        Назначить мастера на заказ, заблокированный через claim_unassigned_orders.
+        Без commit: вызывающий фиксирует все назначения цикла одной транзакцией.
+        """
+        if order.status == OrderStatus.rejected:
+            order.status = OrderStatus.new
+            await self._count_status(order.datetime, OrderStatus.rejected, OrderStatus.new)
+        await self.assignment_repo.create_for_order(order, master_id)
+        await self.session.flush()
+        return order
+    
+    async def reject_and_reassign(
+        self,
+        order_id: int,
+        master_id: int,
+        new_master_id: Optional[int] = None
+    ) -> Order:
+        """
+        Отказ мастера от заказа одной транзакцией: снять назначение, отметить
+        отказ в графике и, если замена найдена, сразу назначить нового мастера.
+        Без замены заказ остается rejected и уходит в очередь диспетчера.
+        """
+        from services.master_service import MasterService
+
+        order = await self.order_repo.get_for_update(order_id)
+        if not order:
+            raise ValueError(f"Заказ с ID {order_id} не найден")
+        old_status = order.status
+
+        assignment = await self.assignment_repo.get_by_order(order_id)
+        if assignment:
+            await self.assignment_repo.delete(assignment.id)
+        await MasterService(self.session).update_schedule(
+            master_id, order.datetime, "отменено", commit=False
+        )
+
+        if new_master_id:
+            await advisory_xact_lock(self.session, MASTER_LOCK, new_master_id)
+            order.status = OrderStatus.new
+            try:
+                await self.assignment_repo.create_for_order(order, new_master_id)
+            except ValueError:
+                # Замена уже занята (другой процесс) - отказ без переназначения
+                new_master_id = None
+        if not new_master_id:
+            order.status = OrderStatus.rejected
+        await self._count_status(order.datetime, old_status, order.status)
+
+        await self.session.commit()
+
+        availability_index.remove(order_id)
+        if new_master_id:
+            availability_index.add(order_id, new_master_id, order.datetime)
+        else:
+            dispatch_queue.push(order_id, exclude_master_id=master_id)
+        return order
+    
+    async def unassign_order(self, order_id: int) -> bool:
+        """Снять мастера с заказа"""
+        assignment = await self.assignment_repo.get_by_order(order_id)
+        if not assignment:
+            return False
         
-        orders = await self.order_repo.get_by_ids(order_ids)
-        return sorted(orders, key=lambda x: x.datetime, reverse=True)
+        await self.assignment_repo.delete(assignment.id)
+        availability_index.remove(order_id)
+        return True
+    
+    async def get_unassigned_orders(
+        self,
+        order_ids: Optional[List[int]] = None,
+        statuses: Tuple[OrderStatus, ...] = (OrderStatus.new,),
+        from_datetime: Optional[datetime] = None
+    ) -> List[Order]:
+        """Заказы, ожидающие назначения мастера"""
+        return await self.order_repo.get_unassigned(order_ids, statuses, from_datetime)
+    
+    async def claim_unassigned_orders(
+        self,
+        order_ids: Optional[List[int]] = None,
+        statuses: Tuple[OrderStatus, ...] = (OrderStatus.new,),
+        from_datetime: Optional[datetime] = None
+    ) -> List[Order]:
+        """Заказы, ожидающие назначения, с блокировкой (FOR UPDATE SKIP LOCKED)"""
+        return await self.order_repo.claim_unassigned(order_ids, statuses, from_datetime)
+    
+    async def get_order_list_by_master(self, master_id: int) -> List[Row]:
+        """Строки списка заказов мастера (с именем мастера, без тяжелых полей)"""
+        orders, _ = await self.order_repo.get_for_master(master_id)
+        return orders
     
     async def update_status(
         self,
@@ -112,7 +218,9 @@ class OrderService:
         work_photos: List[str] = None
     ) -> Order:
         """Обновить статус заказа"""
-        order = await self.order_repo.get(order_id)
+        # Блокировка строки: параллельные смены статуса не собьют счетчики
+        order = await self.order_repo.get_for_update(order_id)
+        await self._count_status(order.datetime, order.status, status)
         order.status = status
         
         if status == OrderStatus.completed:
@@ -127,9 +235,28 @@ class OrderService:
             
             order.calculate_profit()
         
+        # Интервал занятости мастера: только пока заказ активен
+        try:
+            await self.assignment_repo.set_occupied(
+                order_id, order.datetime if status in ACTIVE_ORDER_STATUSES else None
+            )
+        except ValueError:
+            await self.session.rollback()
+            raise
+        
         await self.session.flush()
         await self.session.commit()
         await self.session.refresh(order)
+        
+        # Индекс занятости: завершенные и отклоненные заказы время не занимают
+        if status not in ACTIVE_ORDER_STATUSES:
+            availability_index.remove(order_id)
+            if status == OrderStatus.completed:
+                fallback_candidates.discard(order_id)
+        elif not availability_index.contains(order_id):
+            assignment = await self.assignment_repo.get_by_order(order_id)
+            if assignment:
+                availability_index.add(order_id, assignment.master_id, order.datetime)
         return order
     
 
@@ -169,12 +296,16 @@ class OrderService:
             order_id: int
     ) -> None:
         """Удалить заказ по ID"""
-        order = await self.order_repo.get(order_id)
+        order = await self.order_repo.get_for_update(order_id)
         if not order:
             raise ValueError(f"Заказ с ID {order_id} не найден")
         
+        await self._count_status(order.datetime, order.status, None)
         await self.order_repo.delete(order_id)
         await self.session.commit()
+        availability_index.remove(order_id)
+        dispatch_queue.discard(order_id)
+        fallback_candidates.discard(order_id)
 
         return True
     
@@ -184,4 +315,82 @@ class OrderService:
     
     async def get_orders_count_by_filter(self, status: OrderStatus) -> int:
         """Получить количество заказов по статусу"""
-        return await self.order_repo.get_count_by_status(status=status)
\ No newline at end of file
+        return await self.order_repo.get_count_by_status(status=status)
+
+    async def get_orders_page(
+        self,
+        status: Optional[OrderStatus] = None,
+        day: Optional[date] = None,
+        cursor: Optional[Cursor] = None,
+        backward: bool = False,
+        limit: int = 5
+    ) -> Tuple[List[Row], bool]:
+        """Страница списка заказов по курсору: (строки, есть ли еще в этом направлении)"""
+        date_from, date_to = self._day_bounds(day)
+        return await self.order_repo.get_page(
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            backward=backward,
+            limit=limit
+        )
+
+    async def count_orders(self, status: Optional[OrderStatus] = None, day: Optional[date] = None) -> int:
+        """Количество заказов по фильтру (из счетчиков по статусам)"""
+        return await self.order_repo.count_by_counters(status, day)
+
+    async def get_status_summary(self, day: Optional[date] = None) -> dict:
+        """Сводка по статусам: {"total": {статус: n}, "day": {статус: n}}"""
+        day = day or date.today()
+        return {
+            "total": await self.order_repo.get_status_counts(),
+            "day": await self.order_repo.get_status_counts(day),
+        }
+
+    async def _count_status(
+        self,
+        order_datetime: datetime,
+        old_status: Optional[OrderStatus],
+        new_status: Optional[OrderStatus]
+    ):
+        """Перенести заказ между счетчиками статусов (None - заказа нет)"""
+        if old_status == new_status:
+            return
+        day = order_datetime.date()
+        if old_status is not None:
+            await self.order_repo.add_status_count(day, old_status, -1)
+        if new_status is not None:
+            await self.order_repo.add_status_count(day, new_status, 1)
+
+    async def search_orders(self, query: str, limit: int = SEARCH_RESULTS_LIMIT) -> List[Row]:
+        """
+        Поиск заказов: начало номера (2025-10-...), цифры телефона или
+        подстрока имени клиента/адреса. Короткие запросы не ищутся -
+        триграммные индексы работают от 3 символов.
+        """
+        query = query.strip()
+        if re.fullmatch(r"\d{4}-[\d-]*", query):
+            return await self.order_repo.search_by_number(query, limit)
+        digits = normalize_phone(query)
+        if re.fullmatch(r"[\d\s()+-]+", query):
+            if len(digits) < 3:
+                return []
+            return await self.order_repo.search_by_phone(digits, limit)
+        if len(query) < 3:
+            return []
+        return await self.order_repo.search_text(query, limit)
+
+    async def get_client_history(self, phone: str, limit: int = 5) -> List[Row]:
+        """Прошлые заказы клиента (по нормализованному телефону)"""
+        phone_e164 = to_e164(phone)
+        if phone_e164 is None:
+            return []
+        return await self.order_repo.get_list_by_phone(phone_e164, limit)
+
+    @staticmethod
+    def _day_bounds(day: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+        if day is None:
+            return None, None
+        start = datetime.combine(day, datetime.min.time())
+        return start, start + timedelta(days=1)
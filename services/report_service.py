@@ -1,5 +1,5 @@
-from typing import Optional, Dict, List
-from datetime import date
+from typing import Optional, Dict, List, Tuple
+from datetime import date, datetime, timedelta
 import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +9,16 @@ from repositories.assignment import AssignmentRepository
 from repositories.master import MasterRepository
 
 
+def period_bounds(
+    date_from: Optional[date],
+    date_to: Optional[date]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Период по дням (включительно) -> [начало, конец) по времени заказа"""
+    start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    end = datetime.combine(date_to + timedelta(days=1), datetime.min.time()) if date_to else None
+    return start, end
+
+
 class ReportService:
     """Сервис для генерации отчетов"""
     
@@ -23,47 +33,36 @@ class ReportService:
         date_from: Optional[date] = None, 
         date_to: Optional[date] = None
     ) -> Dict:
-        """Финансовый отчет"""
-        if date_from is None and date_to is None:
-            orders = await self.order_repo.get_by_status(OrderStatus.completed)
-        else:
-            orders = await self.order_repo.get_by_date_range(
-                date_from, date_to, OrderStatus.completed
-            )
-        
-        total_profit = sum(getattr(o, 'profit', 0) for o in orders)
-        total_revenue = sum(getattr(o, 'work_amount', 0) for o in orders)
-        total_expenses = sum(getattr(o, 'expenses', 0) for o in orders)
+        """Финансовый отчет (суммы считаются в БД, заказы не загружаются)"""
+        totals = await self.order_repo.get_totals(
+            OrderStatus.completed, *period_bounds(date_from, date_to)
+        )
         
         return {
-            "orders_count": len(orders),
-            "total_profit": total_profit,
-            "total_revenue": total_revenue,
-            "total_expenses": total_expenses,
-            "average_profit": total_profit / len(orders) if orders else 0
+            "orders_count": totals.orders_count,
+            "total_profit": totals.total_profit,
+            "total_revenue": totals.total_revenue,
+            "total_expenses": totals.total_expenses,
+            "average_profit": totals.total_profit / totals.orders_count if totals.orders_count else 0
         }
     
     async def get_masters_report(
         self, 
         date_from: Optional[date] = None, 
         date_to: Optional[date] = None
-    ) -> Dict[str, Dict]:
-        """Отчет по мастерам"""
-        if date_from is None and date_to is None:
-            assignments = await self.assignment_repo.get_all_assignments()
-        else:
-            assignments = await self.assignment_repo.get_by_date_range(date_from, date_to)
-        
-        stats = {}
-        for assignment in assignments:
-            if assignment.order and assignment.order.status == OrderStatus.completed:
-                master_name = assignment.master.name
-                if master_name not in stats:
-                    stats[master_name] = {"orders_count": 0, "total_profit": 0.0}
-                stats[master_name]["orders_count"] += 1
-                stats[master_name]["total_profit"] += getattr(assignment.order, 'profit', 0)
-        
-        return stats
+    ) -> Dict[int, Dict]:
+        """Отчет по мастерам (GROUP BY в БД): {master_id: {"name", "orders_count", "total_profit"}}"""
+        rows = await self.assignment_repo.get_master_totals(
+            OrderStatus.completed, *period_bounds(date_from, date_to)
+        )
+        return {
+            row.id: {
+                "name": row.name,
+                "orders_count": row.orders_count,
+                "total_profit": row.total_profit
+            }
+            for row in rows
+        }
     
     async def get_orders_report(
         self, 
@@ -119,11 +118,11 @@ class ReportService:
         stats = await self.get_masters_report(date_from, date_to)
         data = [
             {
-                "Мастер": master, 
+                "Мастер": s["name"], 
                 "Заказы": s["orders_count"], 
                 "Прибыль": s["total_profit"]
             } 
-            for master, s in stats.items()
+            for s in stats.values()
         ]
         
         df = pd.DataFrame(data)
@@ -189,40 +188,19 @@ class ReportService:
         
         # Мастера с навыками
         masters = await self.master_repo.get_all_with_skills()
-        master_stats = {}
-        
-        for master in masters:
-            assignments = await self.assignment_repo.get_by_master(master.id)
-            total_profit = sum(
-                getattr(a.order, 'profit', 0) 
-                for a in assignments 
-                if a.order and a.order.status == OrderStatus.completed
-            )
-            total_expenses = sum(
-                getattr(a.order, 'expenses', 0) 
-                for a in assignments 
-                if a.order and a.order.status == OrderStatus.completed
-            )
-            total_revenue = sum(
-                getattr(a.order, 'work_amount', 0) 
-                for a in assignments 
-                if a.order and a.order.status == OrderStatus.completed
-            )
-            orders_count = len([
-                a for a in assignments 
-                if a.order and a.order.status == OrderStatus.completed
-            ])
-            
-            master_stats[master.name] = {
-                "orders_count": orders_count,
-                "total_revenue": total_revenue,
-                "total_expenses": total_expenses,
-                "total_profit": total_profit
+        master_stats = {
+            row.id: {
+                "orders_count": row.orders_count,
+                "total_revenue": row.total_revenue,
+                "total_expenses": row.total_expenses,
+                "total_profit": row.total_profit
             }
+            for row in await self.assignment_repo.get_master_totals(OrderStatus.completed)
+        }
         
         masters_data = []
         for master in masters:
-            stats = master_stats.get(master.name, {
+            stats = master_stats.get(master.id, {
                 "orders_count": 0, 
                 "total_revenue": 0, 
                 "total_expenses": 0, 
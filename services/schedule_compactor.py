@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from config import (
+    SCHEDULE_RETENTION_DAYS, SCHEDULE_RETENTION_MODE,
+    SCHEDULE_COMPACTION_BATCH, SCHEDULE_COMPACTION_HOUR
+)
+from database.engine import get_session
+from repositories.master import MasterRepository
+from repositories.schedule import ScheduleRepository
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_JOB_ID = "schedule_compaction"
+
+
+class ScheduleCompactor:
+    """
+    Ежесуточная очистка графика мастеров от прошедших дат.
+
+    - слоты старше SCHEDULE_RETENTION_DAYS дней переносятся в архив
+      (или удаляются при SCHEDULE_RETENTION_MODE="delete");
+    - из устаревшего JSON masters.schedule вычищаются те же даты.
+
+    Каждая пачка - отдельная короткая транзакция, поэтому таблицы не
+    блокируются надолго, а прерванный проход продолжится в следующий раз.
+    """
+
+    def __init__(
+        self,
+        retention_days: int = SCHEDULE_RETENTION_DAYS,
+        batch_size: int = SCHEDULE_COMPACTION_BATCH,
+        keep: bool = SCHEDULE_RETENTION_MODE != "delete"
+    ):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.keep = keep
+        self._running = False
+
+    def start(self, scheduler: AsyncIOScheduler):
+        """Зарегистрировать задачу в планировщике"""
+        scheduler.add_job(
+            self.run, "cron",
+            hour=SCHEDULE_COMPACTION_HOUR,
+            id=COMPACTION_JOB_ID,
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    def cutoff(self) -> datetime:
+        """Слоты раньше этого времени убираются из графика"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=self.retention_days)
+
+    async def run(self):
+        if self._running:
+            return
+        self._running = True
+        try:
+            cutoff = self.cutoff()
+            slots = await self.compact_slots(cutoff)
+            await self.compact_legacy(cutoff)
+            if slots:
+                action = "archived" if self.keep else "deleted"
+                logger.info(f"Schedule compaction: {slots} slots before {cutoff:%Y-%m-%d} {action}")
+        except Exception as e:
+            logger.error(f"Error in schedule compaction: {e}")
+        finally:
+            self._running = False
+
+    async def compact_slots(self, cutoff: datetime) -> int:
+        """Слоты раньше cutoff - в архив, пачками"""
+        total = 0
+        while True:
+            async with get_session() as session:
+                moved = await ScheduleRepository(session).archive_before(
+                    cutoff, self.batch_size, keep=self.keep
+                )
+            total += moved
+            if moved < self.batch_size:
+                return total
+
+    async def compact_legacy(self, cutoff: datetime):
+        """Прошедшие даты из masters.schedule, пачками по id"""
+        last_id = 0
+        while True:
+            async with get_session() as session:
+                last_id = await MasterRepository(session).prune_legacy_schedule(
+                    last_id, cutoff.date(), self.batch_size
+                )
+            if last_id is None:
+                return
+
+
+schedule_compactor = ScheduleCompactor()
@@ -1,8 +1,10 @@
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import SKILL_CATALOG_TTL
 from models import Skill
 from repositories.skill import SkillRepository
+from core.skill_catalog import skill_catalog
 
 
 class SkillService:
@@ -14,15 +16,34 @@ class SkillService:
     
     async def create_skill(self, name: str, description: str = None) -> Skill:
         """Создать навык"""
-        return await self.skill_repo.create(
+        skill = await self.skill_repo.create(
             name=name,
             description=description
         )
+        await self.session.commit()
+        skill_catalog.add(skill)
+        return skill
     
     async def get_all_skills(self) -> List[Skill]:
         """Получить все навыки"""
         return await self.skill_repo.get_all()
     
+    async def load_catalog(self):
+        """Загрузить каталог навыков (при старте бота)"""
+        skill_catalog.load(await self.skill_repo.get_all())
+    
+    async def ensure_catalog(self):
+        """
+        Перезагрузить каталог, если список навыков в БД изменился (например,
+        навык добавлен другим процессом). Сверка - не чаще раза в SKILL_CATALOG_TTL
+        """
+        if skill_catalog.loaded and not skill_catalog.needs_check(SKILL_CATALOG_TTL):
+            return
+        if skill_catalog.loaded and await self.skill_repo.get_fingerprint() == skill_catalog.fingerprint():
+            skill_catalog.mark_checked()
+            return
+        await self.load_catalog()
+    
     async def get_skill_by_name(self, name: str) -> Skill:
         """Получить навык по имени"""
-        return await self.skill_repo.get_by_name(name)
\ No newline at end of file
+        return await self.skill_repo.get_by_name(name)
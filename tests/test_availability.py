@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from core.availability import AvailabilityIndex
+
+
+NOON = datetime(2026, 10, 20, 12)
+
+
+def test_is_free_buffer_boundaries():
+    index = AvailabilityIndex()
+    index.build([(1, 10, NOON)])
+
+    # Конфликт - строго ближе чем на буфер
+    assert index.is_free(10, NOON - timedelta(hours=4))
+    assert not index.is_free(10, NOON - timedelta(hours=4) + timedelta(minutes=1))
+    assert not index.is_free(10, NOON)
+    assert not index.is_free(10, NOON + timedelta(hours=4) - timedelta(minutes=1))
+    assert index.is_free(10, NOON + timedelta(hours=4))
+    assert index.is_free(20, NOON)
+
+
+def test_add_remove_and_snapshot():
+    index = AvailabilityIndex()
+    index.build([])
+    index.add(1, 10, NOON)
+    index.add(2, 10, NOON - timedelta(hours=8))
+    assert index.busy_times(10) == [NOON - timedelta(hours=8), NOON]
+    assert index.today_count(10, NOON.date()) == 2
+
+    # Повторное add того же заказа переносит его, а не дублирует
+    index.add(1, 10, NOON + timedelta(days=1))
+    assert index.active_count(10) == 2
+    assert index.today_count(10, NOON.date()) == 1
+
+    copy = index.snapshot()
+    copy.remove(2)
+    assert index.active_count(10) == 2
+    assert copy.active_count(10) == 1
+
+    index.remove(1)
+    index.remove(1)
+    assert index.busy_times(10) == [NOON - timedelta(hours=8)]
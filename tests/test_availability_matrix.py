@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from core.availability import AvailabilityIndex
+from core.availability_matrix import AvailabilityMatrix
+
+
+NOON = datetime(2026, 10, 20, 12)
+
+
+def test_matrix_matches_index_at_slot_edges():
+    index = AvailabilityIndex()
+    index.build([
+        (1, 10, NOON),
+        (2, 20, NOON + timedelta(minutes=7)),
+        (3, 30, NOON - timedelta(hours=4)),
+    ])
+    masters = [SimpleNamespace(id=i, skill_mask=0) for i in (10, 20, 30, 40)]
+
+    # Каждые 7 минут: попадания и на границы слотов, и внутрь них
+    order_times = [NOON - timedelta(hours=5) + timedelta(minutes=7 * k) for k in range(90)]
+    matrix = AvailabilityMatrix.for_orders(masters, index, order_times)
+    free = matrix.time_free(order_times)
+
+    for n, t in enumerate(order_times):
+        for row, master in enumerate(masters):
+            assert free[n, row] == index.is_free(master.id, t), (t, master.id)
+
+
+def test_matrix_schedule_blocks():
+    index = AvailabilityIndex()
+    index.build([])
+    masters = [SimpleNamespace(id=10, skill_mask=0), SimpleNamespace(id=20, skill_mask=0)]
+    matrix = AvailabilityMatrix.for_orders(masters, index, [NOON], blocked={20: {NOON}})
+
+    assert matrix.time_free([NOON]).tolist() == [[True, False]]
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from core.availability import AvailabilityIndex
+from core.free_slots import next_free_slots
+
+
+def test_slots_keep_their_master():
+    index = AvailabilityIndex()
+    index.build([(1, 10, datetime(2026, 10, 20, 9)), (2, 20, datetime(2026, 10, 20, 12))])
+
+    slots = next_free_slots(
+        index, [10, 20], datetime(2026, 10, 20, 9), datetime(2026, 10, 21), 12,
+        buffer_hours=4, day_start_hour=9, day_end_hour=21
+    )
+
+    assert slots[0] == (datetime(2026, 10, 20, 13), 10)
+    assert {master_id for _, master_id in slots} == {10, 20}
+    assert [t for t, _ in slots] == sorted(t for t, _ in slots)
+    for t, master_id in slots:
+        assert index.is_free(master_id, t, 4)
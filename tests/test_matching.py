@@ -0,0 +1,60 @@
+from itertools import permutations
+
+from core.matching import INFEASIBLE, min_cost_assignment
+
+
+def brute_force(cost):
+    """Минимальная стоимость и число допустимых пар перебором"""
+    n, m = len(cost), len(cost[0])
+    best = None
+    if n <= m:
+        candidates = ([(i, j) for i, j in enumerate(cols)] for cols in permutations(range(m), n))
+    else:
+        candidates = ([(i, j) for j, i in enumerate(rows)] for rows in permutations(range(n), m))
+    for pairs in candidates:
+        feasible = [(i, j) for i, j in pairs if cost[i][j] < INFEASIBLE]
+        key = (-len(feasible), sum(cost[i][j] for i, j in feasible))
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def check(cost):
+    pairs = min_cost_assignment(cost)
+    assert len({i for i, _ in pairs}) == len(pairs)
+    assert len({j for _, j in pairs}) == len(pairs)
+    assert all(cost[i][j] < INFEASIBLE for i, j in pairs)
+    assert (-len(pairs), sum(cost[i][j] for i, j in pairs)) == brute_force(cost)
+    return pairs
+
+
+def test_empty():
+    assert min_cost_assignment([]) == []
+    assert min_cost_assignment([[]]) == []
+
+
+def test_square():
+    assert check([[4, 1, 3], [2, 0, 5], [3, 2, 2]]) == [(0, 1), (1, 0), (2, 2)]
+
+
+def test_more_columns_than_rows():
+    check([[7, 3, 9, 1], [2, 8, 4, 6]])
+
+
+def test_more_rows_than_columns():
+    check([[5, 1], [1, 5], [0, 0], [9, 2]])
+
+
+def test_infeasible_pairs_dropped():
+    cost = [[INFEASIBLE, INFEASIBLE], [3, INFEASIBLE]]
+    assert check(cost) == [(1, 0)]
+
+
+def test_infeasible_forces_second_best():
+    # Дешевая пара (0, 0) мешает назначить строку 1 - выгоднее две пары
+    cost = [[1, 2], [3, INFEASIBLE]]
+    assert check(cost) == [(0, 1), (1, 0)]
+
+
+def test_all_infeasible():
+    assert min_cost_assignment([[INFEASIBLE] * 3] * 2) == []
@@ -0,0 +1,42 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from core.pagination import decode_cursor, encode_cursor, page_flags, page_token, parse_page
+
+
+def test_cursor_round_trip_keeps_microseconds():
+    dt = datetime(2026, 10, 20, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(dt, 42)) == (dt, 42)
+    assert decode_cursor(encode_cursor(datetime(1969, 12, 31, 23, 59), 1)) == (datetime(1969, 12, 31, 23, 59), 1)
+
+
+def test_decode_rejects_broken_values():
+    for value in ("", "abc", "1.2.3", "12", "x.1", "1.y", "99999999999999999999.1"):
+        assert decode_cursor(value) is None
+
+
+def test_parse_page():
+    dt = datetime(2026, 10, 20, 12)
+    token = encode_cursor(dt, 7)
+    assert parse_page([]) == (1, None, False)
+    assert parse_page(["3"]) == (1, None, False)
+    assert parse_page(["3", "n" + token]) == (3, (dt, 7), False)
+    assert parse_page(["2", "p" + token]) == (2, (dt, 7), True)
+    assert parse_page(["0", "n" + token]) == (1, (dt, 7), False)
+    assert parse_page(["x", "n" + token]) == (1, (dt, 7), False)
+    assert parse_page(["3", "nbroken"]) == (1, None, False)
+
+
+def test_page_token_round_trip():
+    row = SimpleNamespace(datetime=datetime(2026, 10, 20, 12, 0, 0, 5), id=9)
+    assert parse_page(page_token(4, row, False).split("_")) == (4, (row.datetime, 9), False)
+    assert parse_page(page_token(3, row, True).split("_")) == (3, (row.datetime, 9), True)
+
+
+def test_page_flags():
+    # Вперед: назад можно со второй страницы, вперед - если есть еще строки
+    assert page_flags(1, False, True) == (1, False, True)
+    assert page_flags(2, False, False) == (2, True, False)
+    # Назад: если строк больше нет - это первая страница
+    assert page_flags(3, True, True) == (3, True, True)
+    assert page_flags(3, True, False) == (1, False, True)